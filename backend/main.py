@@ -1,7 +1,18 @@
 import os
+import json
+import uuid
+import time
+import random
+import asyncio
+import hashlib
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+import httpx
 from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from passlib.context import CryptContext
@@ -10,7 +21,7 @@ from jose import JWTError, jwt
 from datetime import datetime, timedelta
 
 import database
-from database import SessionLocal, engine, User
+from database import SessionLocal, engine, User, ChatSession, ChatMessage
 
 # --- Configuration ---
 # IMPORTANT: For production, you should use environment variables for these secrets.
@@ -28,9 +39,201 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "a-very-secret-key-that-you-should-cha
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
+# Comma-separated Ollama URLs to balance across; defaults to the single OLLAMA_BASE_URL
+OLLAMA_NODES = [url.strip() for url in os.environ.get("OLLAMA_NODES", OLLAMA_BASE_URL).split(",") if url.strip()]
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", "100"))
+OLLAMA_MAX_KEEPALIVE = int(os.environ.get("OLLAMA_MAX_KEEPALIVE", "20"))
+OLLAMA_HEALTH_INTERVAL = float(os.environ.get("OLLAMA_HEALTH_INTERVAL", "10"))
+OLLAMA_EJECT_AFTER_FAILURES = int(os.environ.get("OLLAMA_EJECT_AFTER_FAILURES", "2"))
+# Extra in-flight requests tolerated on a node that has the model loaded before routing elsewhere
+OLLAMA_AFFINITY_SLACK = int(os.environ.get("OLLAMA_AFFINITY_SLACK", "4"))
+
+# Chat history sent to Ollama per turn, and how many sessions stay cached in memory
+CHAT_HISTORY_MESSAGES = int(os.environ.get("CHAT_HISTORY_MESSAGES", "20"))
+CHAT_HISTORY_CHARS = int(os.environ.get("CHAT_HISTORY_CHARS", "16000"))
+CHAT_SESSION_CACHE_SIZE = int(os.environ.get("CHAT_SESSION_CACHE_SIZE", "256"))
+
+# --- Ollama Node Pool ---
+def normalize_model_name(name: str) -> str:
+    return name if ":" in name else f"{name}:latest"
+
+class OllamaNode:
+    """One upstream Ollama server and what the pool knows about it"""
+    def __init__(self, url: str):
+        self.url = url
+        # One pooled client per node, so requests reuse warm keep-alive connections
+        self.client = httpx.AsyncClient(
+            base_url=url,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_KEEPALIVE,
+                keepalive_expiry=60.0
+            )
+        )
+        self.healthy = True
+        self.failures = 0
+        self.outstanding = 0
+        self.running_models: set = set()
+        # None until the first health check has listed the node's models
+        self.installed_models: Optional[set] = None
+        self.last_error: Optional[str] = None
+        self.last_checked: Optional[float] = None
+
+    def status(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "running_models": sorted(self.running_models),
+            "installed_models": sorted(self.installed_models) if self.installed_models is not None else None,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_checked": self.last_checked
+        }
+
+class OllamaPool:
+    """Route Ollama requests across several nodes.
+
+    Requests go to the healthy node with the fewest in-flight requests among
+    those that have the model installed (from /api/tags), preferring nodes
+    that already have it loaded (from /api/ps) unless they are more than
+    OLLAMA_AFFINITY_SLACK requests busier. Nodes failing
+    OLLAMA_EJECT_AFTER_FAILURES health checks or requests in a row are ejected
+    and re-admitted once a health check succeeds again.
+    """
+    def __init__(self, urls: List[str]):
+        self.nodes = [OllamaNode(url) for url in urls]
+        self._health_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.check_all()
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+        await asyncio.gather(*(node.client.aclose() for node in self.nodes))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(OLLAMA_HEALTH_INTERVAL)
+            await self.check_all()
+
+    async def check_all(self):
+        await asyncio.gather(*(self.check(node) for node in self.nodes))
+
+    async def check(self, node: OllamaNode):
+        """Probe a node's running and installed model listings, which double as its liveness check"""
+        try:
+            running, installed = await asyncio.gather(
+                node.client.get("/api/ps", timeout=5.0),
+                node.client.get("/api/tags", timeout=5.0)
+            )
+            running.raise_for_status()
+            installed.raise_for_status()
+            node.running_models = {normalize_model_name(m["name"]) for m in running.json().get("models", [])}
+            node.installed_models = {normalize_model_name(m["name"]) for m in installed.json().get("models", [])}
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            self.record_failure(node, e)
+        else:
+            if not node.healthy:
+                print(f"Ollama node {node.url} is healthy again; re-admitting it")
+            node.healthy = True
+            node.failures = 0
+            node.last_error = None
+        node.last_checked = time.time()
+
+    def record_failure(self, node: OllamaNode, error: Exception):
+        node.failures += 1
+        node.last_error = str(error) or type(error).__name__
+        if node.healthy and node.failures >= OLLAMA_EJECT_AFTER_FAILURES:
+            node.healthy = False
+            print(f"Ejecting Ollama node {node.url}: {node.last_error}")
+
+    def healthy_nodes(self) -> List[OllamaNode]:
+        # With every node ejected, keep trying all of them rather than failing outright
+        return [node for node in self.nodes if node.healthy] or list(self.nodes)
+
+    def pick(self, model: Optional[str] = None) -> OllamaNode:
+        nodes = self.healthy_nodes()
+        least = min(node.outstanding for node in nodes)
+        if model:
+            model = normalize_model_name(model)
+            # Nodes not listed yet may have it; if no node has it, let the request report the 404
+            nodes = [node for node in nodes if node.installed_models is None or model in node.installed_models] or nodes
+            least = min(node.outstanding for node in nodes)
+            warm = [node for node in nodes if model in node.running_models and node.outstanding <= least + OLLAMA_AFFINITY_SLACK]
+            if warm:
+                nodes = warm
+                least = min(node.outstanding for node in nodes)
+        return random.choice([node for node in nodes if node.outstanding == least])
+
+    @asynccontextmanager
+    async def route(self, model: Optional[str] = None):
+        """Pick a node and count the request against it for as long as it runs"""
+        node = self.pick(model)
+        node.outstanding += 1
+        try:
+            yield node
+        except httpx.TransportError as e:
+            # Connection-level failures count toward ejection between health checks
+            self.record_failure(node, e)
+            raise
+        except httpx.HTTPStatusError as e:
+            if model and e.response.status_code == 404 and node.installed_models is not None:
+                # The model is gone from this node; stop routing it here until a health check lists it again
+                node.installed_models.discard(normalize_model_name(model))
+            raise
+        else:
+            node.failures = 0
+            if model:
+                # Serving the request loaded the model there
+                node.running_models.add(normalize_model_name(model))
+                if node.installed_models is not None:
+                    node.installed_models.add(normalize_model_name(model))
+        finally:
+            node.outstanding -= 1
+
+    async def broadcast(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """Send the same request to every healthy node; maps each node URL to its response or error"""
+        async def send(node: OllamaNode):
+            node.outstanding += 1
+            try:
+                response = await node.client.request(method, path, **kwargs)
+                response.raise_for_status()
+                return response
+            except httpx.TransportError as e:
+                self.record_failure(node, e)
+                raise
+            finally:
+                node.outstanding -= 1
+        nodes = self.healthy_nodes()
+        results = await asyncio.gather(*(send(node) for node in nodes), return_exceptions=True)
+        return {node.url: result for node, result in zip(nodes, results)}
+
+def node_outcomes(results: Dict[str, Any]) -> Dict[str, str]:
+    """Per-node "ok" or error message of a broadcast, raising if no node succeeded"""
+    outcomes = {
+        url: f"{type(result).__name__}: {result}" if isinstance(result, Exception) else "ok"
+        for url, result in results.items()
+    }
+    if all(isinstance(result, Exception) for result in results.values()):
+        raise HTTPException(status_code=500, detail={"message": "No Ollama node succeeded", "nodes": outcomes})
+    return outcomes
+
 # --- App Initialization ---
 database.create_db_and_tables()
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ollama_pool = OllamaPool(OLLAMA_NODES)
+    await app.state.ollama_pool.start()
+    yield
+    await app.state.ollama_pool.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # --- Middleware ---
 origins = ["http://localhost:3000"]
@@ -95,6 +298,10 @@ def get_db():
     finally:
         db.close()
 
+# --- Ollama Pool Dependency ---
+def get_ollama_pool(request: Request) -> OllamaPool:
+    return request.app.state.ollama_pool
+
 # --- Pydantic Schemas ---
 class UserCreate(BaseModel):
     email: EmailStr
@@ -285,48 +492,365 @@ async def auth_callback_github(request: Request, db: Session = Depends(get_db)):
     response = RedirectResponse(url=f"/auth/callback?token={access_token}")
     return response
 
-# --- Chat endpoint for Ollama ---
-import httpx
+# --- Single-flight Coalescing ---
+class UpstreamStream:
+    """One streaming Ollama /api/chat response fanned out to every subscriber.
+
+    Chunks are kept until the response ends so late subscribers replay it from
+    the start; generation is cancelled once the last subscriber disconnects.
+    """
+    def __init__(self, pool: OllamaPool, payload: dict):
+        self.chunks: List[dict] = []
+        self.error: Optional[str] = None
+        self.done = False
+        self.subscribers = 0
+        self.on_close = None
+        self.opened = asyncio.get_running_loop().create_future()
+        self.changed = asyncio.Condition()
+        self.task = asyncio.create_task(self._run(pool, payload))
+
+    async def _run(self, pool: OllamaPool, payload: dict):
+        try:
+            async with pool.route(payload["model"]) as node:
+                async with node.client.stream("POST", "/api/chat", json=payload) as response:
+                    if response.is_error:
+                        await response.aread()
+                        response.raise_for_status()
+                    self.opened.set_result(None)
+                    async for line in response.aiter_lines():
+                        if line:
+                            chunk = json.loads(line)
+                            async with self.changed:
+                                self.chunks.append(chunk)
+                                self.changed.notify_all()
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            if not self.opened.done():
+                self.opened.set_exception(e)
+            else:
+                self.error = f"Ollama API error: {str(e)}"
+        finally:
+            if not self.opened.done():
+                self.opened.cancel()
+            async with self.changed:
+                self.done = True
+                self.changed.notify_all()
+            self.close()
+
+    def close(self):
+        if self.on_close:
+            self.on_close()
+            self.on_close = None
+
+    async def wait_opened(self):
+        """Wait for the upstream response headers; raises if the request failed"""
+        await asyncio.shield(self.opened)
+
+    async def subscribe(self):
+        """Yield every chunk of the response, from the first one.
+
+        A subscriber counts only while it is iterating, so a request abandoned
+        before its relay starts can't keep the stream alive for nobody.
+        """
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with self.changed:
+                    await self.changed.wait_for(lambda: position < len(self.chunks) or self.done)
+                    chunks = self.chunks[position:]
+                    finished = self.done
+                position += len(chunks)
+                for chunk in chunks:
+                    yield chunk
+                if finished and position == len(self.chunks):
+                    return
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Nobody is listening anymore: stop generation upstream
+                self.close()
+                self.task.cancel()
+
+class SingleFlight:
+    """Collapse identical concurrent upstream requests into one.
+
+    The first request for a key starts the upstream call as its own task;
+    requests arriving while it runs wait for the same result instead of
+    sending another request. Counters per kind show how many were collapsed.
+    """
+    def __init__(self):
+        self.calls: Dict[tuple, Any] = {}
+        self.metrics: Dict[str, Dict[str, int]] = defaultdict(lambda: {"upstream": 0, "collapsed": 0})
+
+    @staticmethod
+    def make_key(data) -> str:
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    def _forget(self, key: tuple, call):
+        if self.calls.get(key) is call:
+            del self.calls[key]
+
+    async def do(self, kind: str, key: str, func):
+        """Return the result of func(), shared with identical requests already in flight"""
+        key = (kind, key)
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.create_task(func())
+            self.calls[key] = task
+            self.metrics[kind]["upstream"] += 1
+
+            def finished(done: asyncio.Task):
+                self._forget(key, done)
+                if not done.cancelled():
+                    done.exception()
+            task.add_done_callback(finished)
+        else:
+            self.metrics[kind]["collapsed"] += 1
+        # A waiter that disconnects must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def stream(self, kind: str, key: str, pool: OllamaPool, payload: dict) -> UpstreamStream:
+        """Join the in-flight stream for this key, or start one"""
+        key = (kind, key)
+        stream = self.calls.get(key)
+        if stream is None:
+            stream = UpstreamStream(pool, payload)
+            stream.on_close = lambda: self._forget(key, stream)
+            self.calls[key] = stream
+            self.metrics[kind]["upstream"] += 1
+        else:
+            self.metrics[kind]["collapsed"] += 1
+        return stream
+
+    def report(self) -> dict:
+        return {
+            "in_flight": len(self.calls),
+            "requests": {
+                kind: {**counts, "collapsed_ratio": counts["collapsed"] / (counts["upstream"] + counts["collapsed"])}
+                for kind, counts in self.metrics.items()
+            }
+        }
+
+single_flight = SingleFlight()
+
+# --- Chat Sessions ---
+class ChatSessionCache:
+    """Recent messages of the most recently used chat sessions.
+
+    Holds up to max_sessions sessions, each trimmed to its last history_messages
+    messages; anything evicted is reloaded from the database on its next turn.
+    """
+    def __init__(self, max_sessions: int, history_messages: int):
+        self.max_sessions = max_sessions
+        self.history_messages = history_messages
+        self.sessions: OrderedDict[str, List[dict]] = OrderedDict()
+
+    def _remember(self, session_id: str, messages: List[dict]):
+        self.sessions[session_id] = messages[-self.history_messages:]
+        self.sessions.move_to_end(session_id)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+
+    async def create(self, model: str) -> str:
+        session_id = await run_in_threadpool(with_db, create_chat_session, model)
+        self._remember(session_id, [])
+        return session_id
+
+    async def get(self, session_id: str) -> Optional[List[dict]]:
+        """Recent messages of a session, or None if it doesn't exist"""
+        messages = self.sessions.get(session_id)
+        if messages is None:
+            messages = await run_in_threadpool(with_db, get_recent_chat_messages, session_id, self.history_messages)
+            if messages is None:
+                return None
+            self._remember(session_id, messages)
+        else:
+            self.sessions.move_to_end(session_id)
+        return list(messages)
+
+    async def append(self, session_id: str, messages: List[dict]):
+        await run_in_threadpool(with_db, add_chat_messages, session_id, messages)
+        # A session evicted mid-turn stays out of the cache; its next get() reloads the full history
+        if session_id in self.sessions:
+            self._remember(session_id, self.sessions[session_id] + messages)
+
+def with_db(func, *args):
+    """Run a database service with its own session, for use from a threadpool"""
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+def create_chat_session(db: Session, model: str) -> str:
+    db_session = ChatSession(id=uuid.uuid4().hex, model=model)
+    db.add(db_session)
+    db.commit()
+    return db_session.id
+
+def get_recent_chat_messages(db: Session, session_id: str, limit: int) -> Optional[List[dict]]:
+    if db.get(ChatSession, session_id) is None:
+        return None
+    rows = (
+        db.query(ChatMessage)
+        .filter(ChatMessage.session_id == session_id)
+        .order_by(ChatMessage.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [{"role": row.role, "content": row.content} for row in reversed(rows)]
+
+def add_chat_messages(db: Session, session_id: str, messages: List[dict]):
+    db.add_all(ChatMessage(session_id=session_id, role=m["role"], content=m["content"]) for m in messages)
+    db.query(ChatSession).filter(ChatSession.id == session_id).update({"updated_at": datetime.utcnow()})
+    db.commit()
+
+def trim_history(messages: List[dict]) -> List[dict]:
+    """Newest messages that fit the history budget; the latest message is always kept"""
+    kept, size = [], 0
+    for message in reversed(messages):
+        size += len(message["content"])
+        if kept and (len(kept) >= CHAT_HISTORY_MESSAGES or size > CHAT_HISTORY_CHARS):
+            break
+        kept.append(message)
+    return kept[::-1]
 
+chat_sessions = ChatSessionCache(CHAT_SESSION_CACHE_SIZE, CHAT_HISTORY_MESSAGES)
+
+# --- Chat endpoint for Ollama ---
 class ChatRequest(BaseModel):
     message: str
     model: str = "qwen2:0.5b"
+    stream: bool = False
+    session_id: Optional[str] = None
+    options: Optional[Dict[str, Any]] = None
+
+# Timing and token counts from Ollama's final chunk, passed on in the "done" event
+OLLAMA_TIMING_FIELDS = (
+    "total_duration", "load_duration", "prompt_eval_count",
+    "prompt_eval_duration", "eval_count", "eval_duration"
+)
+
+def sse_event(data) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+async def relay_ollama_stream(stream: UpstreamStream, session_id: str, user_message: dict):
+    """Turn Ollama's NDJSON stream into the SSE events the web UI reads, saving the turn once it completes"""
+    parts = []
+    chunks = stream.subscribe()
+    try:
+        async for data in chunks:
+            if data.get("error"):
+                yield sse_event({"type": "error", "content": data["error"]})
+            content = data.get("message", {}).get("content", "")
+            if content:
+                parts.append(content)
+                yield sse_event({"type": "text", "content": content})
+            if data.get("done"):
+                await chat_sessions.append(session_id, [user_message, {"role": "assistant", "content": "".join(parts)}])
+                timings = {field: data[field] for field in OLLAMA_TIMING_FIELDS if field in data}
+                yield sse_event({"type": "done", "session_id": session_id, **timings})
+    finally:
+        # Also runs when the browser disconnects; the last subscriber leaving stops generation upstream
+        await chunks.aclose()
+    if stream.error:
+        yield sse_event({"type": "error", "content": stream.error})
+    yield "data: [DONE]\n\n"
+
+async def start_chat_turn(request: ChatRequest):
+    """Resolve the session and build the /api/chat payload for this turn"""
+    if request.session_id:
+        history = await chat_sessions.get(request.session_id)
+        if history is None:
+            raise HTTPException(status_code=404, detail="Chat session not found")
+        session_id = request.session_id
+    else:
+        session_id = await chat_sessions.create(request.model)
+        history = []
+    user_message = {"role": "user", "content": request.message}
+    payload = {
+        "model": request.model,
+        "messages": trim_history(history + [user_message]),
+        "stream": request.stream
+    }
+    if request.options:
+        payload["options"] = request.options
+    return session_id, user_message, payload
 
 @app.post("/api/chat")
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, pool: OllamaPool = Depends(get_ollama_pool)):
     """Chat endpoint that forwards requests to local Ollama instance"""
-    try:
-        ollama_url = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{ollama_url}/api/generate",
-                json={
-                    "model": request.model,
-                    "prompt": request.message,
-                    "stream": False
-                }
-            )
+    session_id, user_message, payload = await start_chat_turn(request)
+    if request.stream:
+        return await stream_chat(pool, session_id, user_message, payload)
+
+    async def generate():
+        async with pool.route(request.model) as node:
+            response = await node.client.post("/api/chat", json=payload)
             response.raise_for_status()
-            data = response.json()
-            return {"response": data.get("response", "")}
+            return response.json()
+
+    try:
+        data = await single_flight.do("chat", SingleFlight.make_key(payload), generate)
+        content = data.get("message", {}).get("content", "")
+        await chat_sessions.append(session_id, [user_message, {"role": "assistant", "content": content}])
+        return {"response": content, "session_id": session_id}
             
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Ollama API error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+async def stream_chat(pool: OllamaPool, session_id: str, user_message: dict, payload: dict):
+    """Relay tokens as server-sent events while Ollama generates them"""
+    stream = single_flight.stream("chat_stream", SingleFlight.make_key(payload), pool, payload)
+    try:
+        # Connection and status errors surface as HTTP errors before any event is sent
+        await stream.wait_opened()
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Ollama API error: {str(e)}")
+
+    return StreamingResponse(
+        relay_ollama_stream(stream, session_id, user_message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-ID": session_id}
+    )
+
+@app.get("/api/chat/sessions/{session_id}")
+def get_chat_session(session_id: str, db: Session = Depends(get_db)):
+    """Full message history of a chat session"""
+    db_session = db.get(ChatSession, session_id)
+    if db_session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    rows = db.query(ChatMessage).filter(ChatMessage.session_id == session_id).order_by(ChatMessage.id).all()
+    return {
+        "session_id": session_id,
+        "model": db_session.model,
+        "messages": [{"role": row.role, "content": row.content} for row in rows]
+    }
+
 # --- Ollama Model Management Endpoints ---
 
 @app.get("/api/ollama/models")
-async def list_installed_models():
+async def list_installed_models(pool: OllamaPool = Depends(get_ollama_pool)):
     """List all installed Ollama models"""
+    async def fetch_tags():
+        # Nodes may have different models installed; list each model once
+        results = await pool.broadcast("GET", "/api/tags", timeout=30.0)
+        node_outcomes(results)
+        models = {}
+        for response in results.values():
+            if isinstance(response, Exception):
+                continue
+            for model in response.json().get("models", []):
+                models.setdefault(model["name"], model)
+        return {"models": list(models.values())}
+
     try:
-        ollama_url = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{ollama_url}/api/tags")
-            response.raise_for_status()
-            return response.json()
+        # Dashboards poll this; concurrent polls share one upstream request
+        return await single_flight.do("models", "tags", fetch_tags)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing models: {str(e)}")
 
@@ -334,31 +858,54 @@ class PullModelRequest(BaseModel):
     name: str
 
 @app.post("/api/ollama/pull")
-async def pull_model(request: PullModelRequest):
+async def pull_model(request: PullModelRequest, pool: OllamaPool = Depends(get_ollama_pool)):
     """Pull/download an Ollama model"""
+    async def pull():
+        # Every node gets the model so any of them can serve it
+        return node_outcomes(await pool.broadcast(
+            "POST",
+            "/api/pull",
+            json={"name": request.name, "stream": False},
+            timeout=600.0
+        ))
+
     try:
-        ollama_url = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            response = await client.post(
-                f"{ollama_url}/api/pull",
-                json={"name": request.name, "stream": False}
-            )
-            response.raise_for_status()
-            return {"status": "success", "message": f"Model {request.name} pulled successfully"}
+        nodes = await single_flight.do("pull", request.name, pull)
+        # Route the model only to the nodes that now have it
+        await pool.check_all()
+        if all(outcome == "ok" for outcome in nodes.values()):
+            return {"status": "success", "message": f"Model {request.name} pulled successfully", "nodes": nodes}
+        return {"status": "partial", "message": f"Model {request.name} pulled on some nodes only", "nodes": nodes}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error pulling model: {str(e)}")
 
 @app.delete("/api/ollama/models/{model_name}")
-async def delete_model(model_name: str):
+async def delete_model(model_name: str, pool: OllamaPool = Depends(get_ollama_pool)):
     """Delete an Ollama model"""
     try:
-        ollama_url = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.delete(
-                f"{ollama_url}/api/delete",
-                json={"name": model_name}
-            )
-            response.raise_for_status()
-            return {"status": "success", "message": f"Model {model_name} deleted"}
+        nodes = node_outcomes(await pool.broadcast(
+            "DELETE",
+            "/api/delete",
+            json={"name": model_name},
+            timeout=30.0
+        ))
+        await pool.check_all()
+        if all(outcome == "ok" for outcome in nodes.values()):
+            return {"status": "success", "message": f"Model {model_name} deleted", "nodes": nodes}
+        return {"status": "partial", "message": f"Model {model_name} deleted on some nodes only", "nodes": nodes}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting model: {str(e)}")
+
+@app.get("/api/metrics/single-flight")
+async def single_flight_metrics():
+    """How many upstream Ollama requests were shared by identical concurrent requests"""
+    return single_flight.report()
+
+@app.get("/api/ollama/nodes")
+async def list_ollama_nodes(pool: OllamaPool = Depends(get_ollama_pool)):
+    """Health, load and loaded models of each upstream Ollama node"""
+    return {"nodes": [node.status() for node in pool.nodes]}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the Ollama HTTP API used by the benchmarks.
+Streams NDJSON at a configurable token rate, chunk size and first-token latency.
+"""
+
+import argparse
+import json
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Like Ollama's Go server, send small chunks without waiting on Nagle's algorithm
+    disable_nagle_algorithm = True
+    settings = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        line = (json.dumps(data) + "\n").encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _content_chunk(self, text):
+        # /api/generate streams a "response" field, /api/chat a message
+        if self.path == "/api/generate":
+            return {"response": text, "done": False}
+        return {"message": {"role": "assistant", "content": text}, "done": False}
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [
+                {"name": "bench-model", "size": 1_000_000, "digest": "0" * 64, "modified_at": "2024-01-01T00:00:00Z"}
+            ]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [{"name": "bench-model"}]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path == "/api/embed":
+            inputs = body.get("input", [])
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            self._send_json({"embeddings": [[float(len(text) % 13), 1.0, 0.5] for text in inputs]})
+            return
+        if self.path not in ("/api/chat", "/api/generate"):
+            self._send_json({"error": "not found"}, 404)
+            return
+
+        settings = self.settings
+        tokens = settings.tokens
+        started = time.perf_counter()
+        time.sleep(settings.latency)
+        final = {
+            "model": body.get("model", "bench-model"),
+            "done": True,
+            "total_duration": 0,
+            "load_duration": 0,
+            "prompt_eval_count": 10,
+            "prompt_eval_duration": int(settings.latency * 1e9),
+            "eval_count": tokens,
+            "eval_duration": 0
+        }
+
+        if not body.get("stream", True):
+            if settings.rate:
+                time.sleep(tokens / settings.rate)
+            final["total_duration"] = final["eval_duration"] = int((time.perf_counter() - started) * 1e9)
+            final["message"] = {"role": "assistant", "content": "tok " * tokens}
+            final["response"] = "tok " * tokens
+            self._send_json(final)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            sent = 0
+            while sent < tokens:
+                count = min(settings.chunk_size, tokens - sent)
+                self._write_chunk(self._content_chunk("tok " * count))
+                sent += count
+                if settings.rate:
+                    # Pace against the start time so the rate holds at any chunk size
+                    delay = started + settings.latency + sent / settings.rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+            final["total_duration"] = final["eval_duration"] = int((time.perf_counter() - started) * 1e9)
+            final.update(self._content_chunk(""))
+            final["done"] = True
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama API server for benchmarks")
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--tokens', type=int, default=2000, help='Tokens per response')
+    parser.add_argument('--rate', type=float, default=0, help='Tokens per second (0 = as fast as possible)')
+    parser.add_argument('--chunk-size', type=int, default=1, help='Tokens per NDJSON chunk')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds before the first token')
+    settings = parser.parse_args()
+
+    FakeOllamaHandler.settings = settings
+    server = ThreadingHTTPServer(("127.0.0.1", settings.port), FakeOllamaHandler)
+    print(f"Fake Ollama listening on 127.0.0.1:{settings.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Ollama CLI client against a local fake Ollama server.
+
+Measures streaming and non-streaming chat throughput, client CPU per token,
+time-to-first-token overhead and MCP tool round-trip cost, and writes the
+results as JSON. Pass --compare with an earlier results file to see deltas.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+CLI_PATH = BENCH_DIR.parent / "ollama-cli.py"
+
+# Metrics where a larger value is an improvement; all others are costs
+HIGHER_IS_BETTER = ("tokens_per_s", "requests_per_s")
+
+def load_cli():
+    """Import ollama-cli.py as a module"""
+    spec = importlib.util.spec_from_file_location("ollama_cli", CLI_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class FakeServer:
+    """Run fake_ollama.py in a subprocess so its CPU time isn't charged to the client"""
+    def __init__(self, tokens: int, rate: float, chunk_size: int, latency: float):
+        self.port = free_port()
+        self.args = [
+            sys.executable, str(BENCH_DIR / "fake_ollama.py"),
+            "--port", str(self.port), "--tokens", str(tokens), "--rate", str(rate),
+            "--chunk-size", str(chunk_size), "--latency", str(latency)
+        ]
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.args, stdout=subprocess.PIPE, text=True)
+        self.process.stdout.readline()
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+
+class TimingSink:
+    """Stand-in for stdout that discards output and records when the first token is written"""
+    def __init__(self, marker: str):
+        self.marker = marker
+        self.first_token: Optional[float] = None
+
+    def write(self, text: str):
+        if self.first_token is None and self.marker in text:
+            self.first_token = time.perf_counter()
+        return len(text)
+
+    def flush(self):
+        pass
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min": ordered[0]
+    }
+
+def make_assistant(cli, url: str, mcp_manager=None):
+    config = cli.Config()
+    config.base_url = url
+    config.model = "bench-model"
+    config.keep_alive = None
+    config.response_cache = False
+    # Keep the whole run within one context window so eviction doesn't skew throughput
+    config.context_tokens = 10 ** 9
+    return cli.OllamaAssistant(config, mcp_manager)
+
+async def bench_chat(cli, url: str, stream: bool, runs: int, tokens: int, latency: float) -> Dict[str, Any]:
+    """Time repeated chat turns and charge the client's CPU time to each received token"""
+    assistant = make_assistant(cli, url)
+    sink = TimingSink("tok")
+    walls, ttfts = [], []
+    real_stdout = sys.stdout
+    try:
+        await assistant.chat("warm up", stream=stream)
+        cpu_start = time.process_time()
+        for _ in range(runs):
+            assistant.clear_history()
+            sink.first_token = None
+            sys.stdout = sink
+            started = time.perf_counter()
+            await assistant.chat("benchmark", stream=stream)
+            walls.append(time.perf_counter() - started)
+            sys.stdout = real_stdout
+            if stream and sink.first_token is not None:
+                ttfts.append(sink.first_token - started)
+        cpu = time.process_time() - cpu_start
+    finally:
+        sys.stdout = real_stdout
+        await assistant.close()
+
+    total_tokens = tokens * runs
+    result = {
+        "runs": runs,
+        "tokens_per_s": total_tokens / sum(walls),
+        "requests_per_s": runs / sum(walls),
+        "cpu_us_per_token": cpu / total_tokens * 1e6,
+        "wall_s": summarize(walls)
+    }
+    if ttfts:
+        result["ttft_overhead_ms"] = {key: (value - latency) * 1e3 for key, value in summarize(ttfts).items()}
+    return result
+
+async def bench_mcp(cli, calls: int) -> Dict[str, Any]:
+    """Round-trip latency of tool calls through MCPManager to a stub stdio server"""
+    if not cli.MCP_AVAILABLE:
+        return {"skipped": "mcp package not installed"}
+
+    manager = cli.MCPManager(cli.Config())
+    server_config = {"command": sys.executable, "args": [str(BENCH_DIR / "stub_mcp_server.py")]}
+    started = time.perf_counter()
+    if not await manager.connect_server("bench", server_config, timeout=30):
+        return {"skipped": "stub MCP server failed to start"}
+    connect = time.perf_counter() - started
+
+    latencies = []
+    try:
+        await manager.call_tool("bench", "echo", {"text": "warm up"})
+        cpu_start = time.process_time()
+        for i in range(calls):
+            started = time.perf_counter()
+            await manager.call_tool("bench", "echo", {"text": f"call {i}"})
+            latencies.append(time.perf_counter() - started)
+        cpu = time.process_time() - cpu_start
+
+        started = time.perf_counter()
+        await asyncio.gather(*(manager.call_tool("bench", "echo", {"text": f"burst {i}"}) for i in range(calls)))
+        burst = time.perf_counter() - started
+    finally:
+        await manager.disconnect_all()
+
+    return {
+        "calls": calls,
+        "connect_s": connect,
+        "round_trip_ms": {key: value * 1e3 for key, value in summarize(latencies).items()},
+        "cpu_us_per_call": cpu / calls * 1e6,
+        "concurrent_calls_per_s": calls / burst
+    }
+
+async def run_all(args) -> Dict[str, Any]:
+    cli = load_cli()
+    results: Dict[str, Any] = {}
+
+    with FakeServer(args.tokens, 0, args.chunk_size, 0) as server:
+        print(f"⏱️  Streaming throughput ({args.tokens} tokens, {args.chunk_size}/chunk)...")
+        results["stream"] = await bench_chat(cli, server.url, True, args.runs, args.tokens, 0)
+        print("⏱️  Non-streaming throughput...")
+        results["non_stream"] = await bench_chat(cli, server.url, False, args.runs, args.tokens, 0)
+
+    if args.rate:
+        with FakeServer(args.tokens, args.rate, args.chunk_size, args.latency) as server:
+            print(f"⏱️  Paced stream ({args.rate:g} tokens/s, {args.latency * 1e3:g} ms to first token)...")
+            results["paced_stream"] = await bench_chat(cli, server.url, True, max(1, args.runs // 4), args.tokens, args.latency)
+
+    print("⏱️  MCP round trips...")
+    results["mcp"] = await bench_mcp(cli, args.mcp_calls)
+    return results
+
+def flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """Print the change of every metric against a baseline; returns the number of regressions"""
+    old = flatten(baseline.get("results", {}))
+    regressions = 0
+    print(f"\n{'Metric':<40} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    for name, value in flatten(current["results"]).items():
+        if name not in old or name.endswith(("runs", "calls")) or not old[name]:
+            continue
+        change = (value - old[name]) / abs(old[name])
+        worse = -change if name.split(".")[-1] in HIGHER_IS_BETTER else change
+        flag = ""
+        if worse > threshold:
+            flag = " ⚠️"
+            regressions += 1
+        print(f"{name:<40} {old[name]:>12.3f} {value:>12.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Ollama CLI client against a fake Ollama server")
+    parser.add_argument('--tokens', type=int, default=2000, help='Tokens per response')
+    parser.add_argument('--chunk-size', type=int, default=1, help='Tokens per NDJSON chunk')
+    parser.add_argument('--rate', type=float, default=200, help='Token rate for the paced run (0 to skip it)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds to first token for the paced run')
+    parser.add_argument('--runs', type=int, default=20, help='Chat turns per measurement')
+    parser.add_argument('--mcp-calls', type=int, default=200, help='MCP tool calls to time')
+    parser.add_argument('-o', '--output', help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.20, help='Relative change reported as a regression')
+    args = parser.parse_args()
+
+    # Keep the client's config, history and caches away from the real ~/.ollama-cli
+    home = tempfile.mkdtemp(prefix="ollama-cli-bench-")
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+
+    results = asyncio.run(run_all(args))
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results
+    }
+
+    output = Path(args.output) if args.output else BENCH_DIR / "results" / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(results, indent=2))
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n⚠️  {regressions} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
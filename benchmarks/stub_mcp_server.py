@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Minimal stdio MCP server used to measure tool round-trip cost.
+"""
+
+from mcp.server.fastmcp import FastMCP
+
+app = FastMCP("bench-stub")
+
+@app.tool()
+def echo(text: str) -> str:
+    """Return the given text"""
+    return text
+
+if __name__ == "__main__":
+    app.run()
@@ -4,27 +4,312 @@ Ollama Desktop CLI Assistant with MCP Support
 A command-line interface integrated with Ollama and Model Context Protocol
 """
 
-import requests
+from __future__ import annotations
+
+import time
+_STARTUP_MARKS = [("start", time.perf_counter())]
+
 import json
 import sys
 import os
 import subprocess
+import signal
+import codecs
 import platform
 import asyncio
-from typing import Optional, List, Dict, Any
+import threading
+import hashlib
+import sqlite3
+import importlib.util
+import mmap
+from collections import deque, OrderedDict
+from typing import Optional, List, Dict, Any, Callable
 import argparse
 from datetime import datetime
 from pathlib import Path
-import shlex
 
-# MCP imports
-try:
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
-    MCP_AVAILABLE = True
-except ImportError:
-    MCP_AVAILABLE = False
-    print("⚠️  MCP not available. Install with: pip install mcp")
+def lazy_import(name: str):
+    """Return a module that is only actually imported on first attribute access"""
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+httpx = lazy_import("httpx")
+
+# MCP imports (the mcp package is slow to import, so it loads on first connection)
+MCP_AVAILABLE = importlib.util.find_spec("mcp") is not None
+ClientSession = StdioServerParameters = stdio_client = None
+
+def load_mcp():
+    """Import the MCP client classes"""
+    global ClientSession, StdioServerParameters, stdio_client
+    if ClientSession is None:
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
+def load_numpy():
+    """Import NumPy, which only the embedding index needs"""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("NumPy is required for /index and /ask. Install with: pip install numpy")
+    return numpy
+
+def mark_startup(label: str):
+    """Record a startup phase for --startup-profile"""
+    _STARTUP_MARKS.append((label, time.perf_counter()))
+
+_PRINT_STARTUP_PROFILE = False
+
+def startup_ready():
+    """Mark the first prompt as ready, printing the profile if --startup-profile was given"""
+    if _STARTUP_MARKS[-1][0] == "ready":
+        return
+    mark_startup("ready")
+    if _PRINT_STARTUP_PROFILE:
+        print_startup_profile()
+
+def print_startup_profile():
+    """Print how long each startup phase took"""
+    print("\n⏱️  Startup profile:", file=sys.stderr)
+    for (_, previous), (label, at) in zip(_STARTUP_MARKS, _STARTUP_MARKS[1:]):
+        print(f"  {label:<12} {(at - previous) * 1000:7.1f} ms", file=sys.stderr)
+    total = _STARTUP_MARKS[-1][1] - _STARTUP_MARKS[0][1]
+    print(f"  {'total':<12} {total * 1000:7.1f} ms\n", file=sys.stderr)
+
+class ConversationStore:
+    """Append-only SQLite store for saved conversations"""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            model TEXT,
+            title TEXT,
+            message_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            conversation_id INTEGER NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+            seq INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (conversation_id, seq)
+        );
+        CREATE INDEX IF NOT EXISTS conversations_updated ON conversations(updated_at);
+    """
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE messages_fts USING fts5(content, content='messages', content_rowid='rowid');
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+        END;
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        END;
+        INSERT INTO messages_fts(messages_fts) VALUES ('rebuild');
+    """
+    
+    def __init__(self, db_file: Path):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(self.SCHEMA)
+        self.has_fts = self._init_fts()
+    
+    def _init_fts(self) -> bool:
+        """Create the full-text index if needed; False when SQLite lacks FTS5"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            with self.conn:
+                self.conn.executescript("BEGIN;" + self.FTS_SCHEMA + "COMMIT;")
+            return True
+        except sqlite3.OperationalError:
+            return False
+    
+    def append(self, messages: List[Dict], conversation_id: Optional[int] = None, model: Optional[str] = None) -> int:
+        """Store the messages that aren't saved yet; returns the conversation id"""
+        now = datetime.now().isoformat()
+        with self.conn:
+            if conversation_id is None:
+                title = next((msg['content'] for msg in messages if msg.get('role') == 'user'), '')
+                cursor = self.conn.execute(
+                    "INSERT INTO conversations (started_at, updated_at, model, title) VALUES (?, ?, ?, ?)",
+                    (now, now, model, " ".join(title.split())[:80])
+                )
+                conversation_id = cursor.lastrowid
+                saved = 0
+            else:
+                row = self.conn.execute(
+                    "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+                ).fetchone()
+                saved = row[0] if row else 0
+            new_messages = messages[saved:]
+            if not new_messages:
+                return conversation_id
+            self.conn.executemany(
+                "INSERT INTO messages (conversation_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(conversation_id, saved + i, msg.get('role', ''), msg.get('content', ''), now)
+                 for i, msg in enumerate(new_messages)]
+            )
+            self.conn.execute(
+                "UPDATE conversations SET updated_at = ?, message_count = ?, "
+                "title = COALESCE(NULLIF(title, ''), ?) WHERE id = ?",
+                (now, saved + len(new_messages),
+                 " ".join(next((m['content'] for m in new_messages if m.get('role') == 'user'), '').split())[:80],
+                 conversation_id)
+            )
+        return conversation_id
+    
+    def list_conversations(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recently updated conversations, without message bodies"""
+        rows = self.conn.execute(
+            "SELECT id, started_at, updated_at, model, title, message_count FROM conversations "
+            "ORDER BY updated_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        keys = ('id', 'started_at', 'updated_at', 'model', 'title', 'message_count')
+        return [dict(zip(keys, row)) for row in rows]
+    
+    def get_messages(self, conversation_id: int) -> List[Dict]:
+        """All messages of one conversation in order"""
+        rows = self.conn.execute(
+            "SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY seq", (conversation_id,)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+    
+    def search(self, terms: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Saved user/assistant messages matching all terms, best matches first"""
+        words = terms.split()
+        if not words:
+            return []
+        if self.has_fts:
+            query = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+            rows = self.conn.execute(
+                "SELECT m.conversation_id, m.seq, m.role, "
+                "snippet(messages_fts, 0, '[', ']', '…', 12), c.title, c.updated_at "
+                "FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid "
+                "JOIN conversations c ON c.id = m.conversation_id "
+                "WHERE messages_fts MATCH ? AND m.role != 'system' ORDER BY rank LIMIT ?",
+                (query, limit)
+            ).fetchall()
+        else:
+            clauses = " AND ".join("m.content LIKE ?" for _ in words)
+            rows = self.conn.execute(
+                "SELECT m.conversation_id, m.seq, m.role, substr(m.content, 1, 120), c.title, c.updated_at "
+                "FROM messages m JOIN conversations c ON c.id = m.conversation_id "
+                f"WHERE {clauses} AND m.role != 'system' ORDER BY c.updated_at DESC LIMIT ?",
+                [f"%{word}%" for word in words] + [limit]
+            ).fetchall()
+        keys = ('conversation_id', 'seq', 'role', 'snippet', 'title', 'updated_at')
+        return [dict(zip(keys, row)) for row in rows]
+    
+    def compact(self, keep: Optional[int] = None) -> int:
+        """Delete all but the newest keep conversations and reclaim space; returns how many were deleted"""
+        deleted = 0
+        with self.conn:
+            if keep is not None:
+                cursor = self.conn.execute(
+                    "DELETE FROM conversations WHERE id NOT IN "
+                    "(SELECT id FROM conversations ORDER BY updated_at DESC LIMIT ?)", (keep,)
+                )
+                deleted = cursor.rowcount
+        self.conn.execute("VACUUM")
+        return deleted
+    
+    def import_json_history(self, history_file: Path):
+        """One-time import of the legacy history.json file"""
+        with open(history_file, 'r') as f:
+            history = json.load(f)
+        for entry in history:
+            conversation_id = self.append(entry.get('messages', []))
+            timestamp = entry.get('timestamp')
+            if timestamp:
+                with self.conn:
+                    self.conn.execute(
+                        "UPDATE conversations SET started_at = ?, updated_at = ? WHERE id = ?",
+                        (timestamp, timestamp, conversation_id)
+                    )
+    
+    def close(self):
+        self.conn.close()
+
+class ResponseCache:
+    """Exact-match cache of /api/chat results: in-memory hot tier over an LRU SQLite file"""
+    def __init__(self, db_file: Path, max_entries: int = 1000, memory_entries: int = 128):
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, result TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self.count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Hash of everything in a request that affects the answer"""
+        relevant = {k: v for k, v in payload.items() if k not in ('stream', 'keep_alive')}
+        return hashlib.sha256(json.dumps(relevant, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+    
+    @staticmethod
+    def is_deterministic(options: Optional[Dict[str, Any]]) -> bool:
+        """Whether sampling options make the output reproducible"""
+        return bool(options) and (options.get('temperature') == 0 or options.get('seed') is not None)
+    
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.memory.get(key)
+        if result is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return result
+        row = self.conn.execute("SELECT result FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        result = json.loads(row[0])
+        self._remember(key, result)
+        self.hits += 1
+        return result
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        self._remember(key, result)
+        with self.conn:
+            exists = self.conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, result, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(result), time.time())
+            )
+            if not exists:
+                self.count += 1
+            if self.count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (self.count - self.max_entries,)
+                )
+                self.count = self.max_entries
 
 class Config:
     """Configuration management"""
@@ -32,26 +317,44 @@ class Config:
         self.config_dir = Path.home() / ".ollama-cli"
         self.config_file = self.config_dir / "config.json"
         self.history_file = self.config_dir / "history.json"
+        self.conversations_db = self.config_dir / "conversations.db"
+        self.index_dir = self.config_dir / "index"
+        self.response_cache_db = self.config_dir / "response_cache.db"
+        self.models_cache_file = self.config_dir / "models_cache.json"
+        self._conversations: Optional[ConversationStore] = None
         self.mcp_config_file = self.config_dir / "mcp_servers.json"
+        self.mcp_tools_cache_file = self.config_dir / "mcp_tools_cache.json"
         self.config_dir.mkdir(exist_ok=True)
         self.load()
     
     def load(self):
         """Load configuration from file"""
+        data = {}
         if self.config_file.exists():
             with open(self.config_file, 'r') as f:
                 data = json.load(f)
-                self.model = data.get('model', 'llama2')
-                self.base_url = data.get('base_url', 'http://localhost:11434')
-                self.stream = data.get('stream', True)
-                self.system_prompt = data.get('system_prompt', '')
-                self.mcp_enabled = data.get('mcp_enabled', True)
-        else:
-            self.model = 'llama2'
-            self.base_url = 'http://localhost:11434'
-            self.stream = True
-            self.system_prompt = ''
-            self.mcp_enabled = True
+        self.model = data.get('model', 'llama2')
+        self.base_url = data.get('base_url', 'http://localhost:11434')
+        self.stream = data.get('stream', True)
+        self.system_prompt = data.get('system_prompt', '')
+        self.mcp_enabled = data.get('mcp_enabled', True)
+        self.context_tokens = data.get('context_tokens', 4096)
+        self.summary_tokens = data.get('summary_tokens', 512)
+        self.mcp_connect_timeout = data.get('mcp_connect_timeout', 30.0)
+        self.mcp_lazy_connect = data.get('mcp_lazy_connect', True)
+        self.mcp_max_concurrent_calls = data.get('mcp_max_concurrent_calls', 4)
+        self.options = data.get('options', {})
+        self.response_cache = data.get('response_cache', False)
+        self.response_cache_size = data.get('response_cache_size', 1000)
+        self.model_cache_ttl = data.get('model_cache_ttl', 30.0)
+        self.keep_alive = data.get('keep_alive', '30m')
+        self.read_max_parallel = data.get('read_max_parallel', 4)
+        self.exec_timeout = data.get('exec_timeout', 300)
+        self.exec_capture_chars = data.get('exec_capture_chars', 8000)
+        self.embed_model = data.get('embed_model', 'nomic-embed-text')
+        self.embed_batch_size = data.get('embed_batch_size', 32)
+        self.ask_top_k = data.get('ask_top_k', 5)
+        self.metrics_file = data.get('metrics_file')
     
     def save(self):
         """Save configuration to file"""
@@ -60,7 +363,24 @@ class Config:
             'base_url': self.base_url,
             'stream': self.stream,
             'system_prompt': self.system_prompt,
-            'mcp_enabled': self.mcp_enabled
+            'mcp_enabled': self.mcp_enabled,
+            'context_tokens': self.context_tokens,
+            'summary_tokens': self.summary_tokens,
+            'mcp_connect_timeout': self.mcp_connect_timeout,
+            'mcp_lazy_connect': self.mcp_lazy_connect,
+            'mcp_max_concurrent_calls': self.mcp_max_concurrent_calls,
+            'options': self.options,
+            'response_cache': self.response_cache,
+            'response_cache_size': self.response_cache_size,
+            'model_cache_ttl': self.model_cache_ttl,
+            'keep_alive': self.keep_alive,
+            'read_max_parallel': self.read_max_parallel,
+            'exec_timeout': self.exec_timeout,
+            'exec_capture_chars': self.exec_capture_chars,
+            'embed_model': self.embed_model,
+            'embed_batch_size': self.embed_batch_size,
+            'ask_top_k': self.ask_top_k,
+            'metrics_file': self.metrics_file
         }
         with open(self.config_file, 'w') as f:
             json.dump(data, f, indent=2)
@@ -109,23 +429,91 @@ class Config:
         with open(self.mcp_config_file, 'w') as f:
             json.dump(servers, f, indent=2)
     
-    def save_conversation(self, messages: List[Dict]):
-        """Save conversation history"""
-        history_data = {
-            'timestamp': datetime.now().isoformat(),
-            'messages': messages
-        }
-        
-        history = []
-        if self.history_file.exists():
-            with open(self.history_file, 'r') as f:
-                history = json.load(f)
-        
-        history.append(history_data)
-        history = history[-10:]
-        
-        with open(self.history_file, 'w') as f:
-            json.dump(history, f, indent=2)
+    def load_mcp_tools_cache(self) -> Dict[str, Any]:
+        """Load the cached MCP tool catalog"""
+        if self.mcp_tools_cache_file.exists():
+            try:
+                with open(self.mcp_tools_cache_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+        return {}
+    
+    def save_mcp_tools_cache(self, cache: Dict[str, Any]):
+        """Save the MCP tool catalog cache"""
+        tmp_file = self.mcp_tools_cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_file, self.mcp_tools_cache_file)
+    
+    @property
+    def conversations(self) -> ConversationStore:
+        """Conversation store, opened on first use"""
+        if self._conversations is None:
+            is_new = not self.conversations_db.exists()
+            self._conversations = ConversationStore(self.conversations_db)
+            if is_new and self.history_file.exists():
+                try:
+                    self._conversations.import_json_history(self.history_file)
+                except (OSError, json.JSONDecodeError):
+                    pass
+        return self._conversations
+    
+    def save_conversation(self, messages: List[Dict], conversation_id: Optional[int] = None, model: Optional[str] = None) -> int:
+        """Save conversation history, appending only messages not stored yet"""
+        return self.conversations.append(messages, conversation_id, model)
+
+class ToolResultCache:
+    """TTL + LRU cache for results of idempotent MCP tool calls on one server.
+    
+    Enabled per server in mcp_servers.json, e.g.
+    "cache": {"tools": ["read_file", "list_directory"], "ttl": 60, "max_entries": 256}
+    where "tools": ["*"] caches every tool of that server.
+    """
+    def __init__(self, tools: List[str], ttl: float = 60.0, max_entries: int = 256):
+        self.tools = set(tools)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def enabled_for(self, tool_name: str) -> bool:
+        return "*" in self.tools or tool_name in self.tools
+    
+    @staticmethod
+    def make_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+        return tool_name + "\0" + json.dumps(arguments, sort_keys=True, separators=(',', ':'), default=str)
+    
+    def get(self, key: str) -> Any:
+        """Return a cached result, or None on a miss or expired entry"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires, result = entry
+            if expires > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self.entries[key]
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, result: Any):
+        self.entries[key] = (time.monotonic() + self.ttl, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+class CachedTool:
+    """Tool definition loaded from the catalog cache, standing in for mcp.types.Tool"""
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.name = data['name']
+        self.description = data.get('description')
+        self.inputSchema = data.get('inputSchema', {})
+    
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        return dict(self.data)
 
 class MCPManager:
     """Manage MCP server connections and tool calls"""
@@ -133,56 +521,214 @@ class MCPManager:
         self.config = config
         self.sessions: Dict[str, ClientSession] = {}
         self.available_tools: Dict[str, Any] = {}
+        self._server_tasks: Dict[str, asyncio.Task] = {}
+        self._stop_events: Dict[str, asyncio.Event] = {}
+        self._ready: Dict[str, asyncio.Future] = {}
+        self._startup_tasks: set = set()
+        self.lazy_servers: Dict[str, Dict[str, Any]] = {}
+        self._connect_locks: Dict[str, asyncio.Lock] = {}
+        self.on_tools_changed: Optional[Callable[[str], None]] = None
+        self.result_caches: Dict[str, ToolResultCache] = {}
+    
+    def _configure_result_cache(self, name: str, server_config: Dict[str, Any]):
+        """Set up the opt-in tool result cache for a server"""
+        cache_config = server_config.get('cache')
+        if not cache_config or name in self.result_caches:
+            return
+        self.result_caches[name] = ToolResultCache(
+            cache_config.get('tools', []),
+            ttl=cache_config.get('ttl', 60.0),
+            max_entries=cache_config.get('max_entries', 256)
+        )
+    
+    @staticmethod
+    def catalog_key(server_config: Dict[str, Any]) -> str:
+        """Cache key for a server's tool catalog, derived from how it is launched"""
+        launch = {
+            'command': server_config.get('command'),
+            'args': server_config.get('args', []),
+            'env': server_config.get('env', {})
+        }
+        return hashlib.sha256(json.dumps(launch, sort_keys=True).encode()).hexdigest()
+    
+    def load_cached_tools(self, name: str, server_config: Dict[str, Any]) -> int:
+        """Register a server's tools from the on-disk catalog without starting it.
         
-    async def connect_server(self, name: str, server_config: Dict[str, Any]) -> bool:
-        """Connect to an MCP server"""
+        Returns the number of tools loaded (0 on a cache miss); the server is
+        started on the first call to one of its tools.
+        """
+        if not MCP_AVAILABLE:
+            return 0
+        entry = self.config.load_mcp_tools_cache().get(self.catalog_key(server_config))
+        if not entry or not entry.get('tools'):
+            return 0
+        try:
+            tools = [CachedTool(tool) for tool in entry['tools']]
+        except (KeyError, TypeError):
+            return 0
+        self.lazy_servers[name] = server_config
+        self._configure_result_cache(name, server_config)
+        self._register_tools(name, tools)
+        return len(tools)
+    
+    def _register_tools(self, name: str, tools: List[Any]):
+        """Replace the tools registered for a server"""
+        for tool_id in [t for t, info in self.available_tools.items() if info['server'] == name]:
+            del self.available_tools[tool_id]
+        for tool in tools:
+            self.available_tools[f"{name}:{tool.name}"] = {
+                'server': name,
+                'tool': tool
+            }
+        if self.on_tools_changed:
+            self.on_tools_changed(name)
+    
+    def _revalidate_catalog(self, name: str, server_config: Dict[str, Any], tools: List[Any], version: Optional[str]):
+        """Store a server's live tool list, re-registering tools if the cache was stale"""
+        key = self.catalog_key(server_config)
+        cache = self.config.load_mcp_tools_cache()
+        entry = {
+            'server': name,
+            'version': version,
+            'tools': [tool.model_dump(mode='json', exclude_none=True) for tool in tools],
+            'cached_at': datetime.now().isoformat()
+        }
+        cached = cache.get(key, {})
+        changed = cached.get('version') != entry['version'] or cached.get('tools') != entry['tools']
+        if changed:
+            cache[key] = entry
+            try:
+                self.config.save_mcp_tools_cache(cache)
+            except OSError:
+                pass
+        if changed or name not in self.lazy_servers:
+            self._register_tools(name, tools)
+    
+    async def ensure_connected(self, name: str) -> bool:
+        """Start a lazily loaded server if it isn't running yet"""
+        if name in self.sessions:
+            return True
+        ready = self._ready.get(name)
+        if ready is not None and not ready.done():
+            # Still starting in the background
+            await asyncio.wait([ready])
+            return name in self.sessions
+        if name not in self.lazy_servers:
+            return False
+        lock = self._connect_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if name in self.sessions:
+                return True
+            server_config = self.lazy_servers[name]
+            print(f"🔌 Starting MCP server: {name}...")
+            timeout = server_config.get('timeout', self.config.mcp_connect_timeout)
+            return await self.connect_server(name, server_config, timeout=timeout)
+        
+    async def connect_server(self, name: str, server_config: Dict[str, Any], timeout: Optional[float] = None) -> bool:
+        """Connect to an MCP server, giving up after timeout seconds"""
+        if not MCP_AVAILABLE:
+            return False
+        
+        load_mcp()
+        self._configure_result_cache(name, server_config)
+        ready = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+        task = asyncio.create_task(self._run_server(name, server_config, ready, stop))
+        self._server_tasks[name] = task
+        self._stop_events[name] = stop
+        self._ready[name] = ready
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), timeout)
+            return True
+        except asyncio.TimeoutError:
+            task.cancel()
+            print(f"❌ Failed to connect to {name}: timed out after {timeout:g}s")
+            return False
+        except Exception as e:
+            print(f"❌ Failed to connect to {name}: {str(e)}")
+            return False
+    
+    async def _run_server(self, name: str, server_config: Dict[str, Any], ready: asyncio.Future, stop: asyncio.Event):
+        """Own one server's transport and session for as long as it stays connected"""
         try:
-            if not MCP_AVAILABLE:
-                return False
-            
             server_params = StdioServerParameters(
                 command=server_config['command'],
                 args=server_config['args'],
                 env=server_config.get('env', {})
             )
             
-            stdio_transport = await stdio_client(server_params)
-            session = ClientSession(stdio_transport[0], stdio_transport[1])
-            await session.initialize()
-            
-            self.sessions[name] = session
-            
-            # Get available tools from this server
-            tools_result = await session.list_tools()
-            for tool in tools_result.tools:
-                self.available_tools[f"{name}:{tool.name}"] = {
-                    'server': name,
-                    'tool': tool
-                }
-            
-            return True
+            async with stdio_client(server_params) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    init_result = await session.initialize()
+                    self.sessions[name] = session
+                    
+                    # Tools already known from the cache: let calls through and revalidate in the background
+                    lazy = name in self.lazy_servers
+                    if lazy:
+                        ready.set_result(True)
+                    
+                    # Get available tools from this server
+                    tools_result = await session.list_tools()
+                    version = getattr(getattr(init_result, 'serverInfo', None), 'version', None)
+                    self._revalidate_catalog(name, server_config, tools_result.tools, version)
+                    
+                    if not lazy:
+                        ready.set_result(True)
+                    await stop.wait()
         except Exception as e:
-            print(f"❌ Failed to connect to {name}: {str(e)}")
-            return False
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            if not ready.done():
+                ready.cancel()
+            self.sessions.pop(name, None)
+            if name not in self.lazy_servers:
+                self._register_tools(name, [])
+            if self._server_tasks.get(name) is asyncio.current_task():
+                del self._server_tasks[name]
+                del self._stop_events[name]
+                del self._ready[name]
     
     async def disconnect_all(self):
         """Disconnect all MCP servers"""
-        for name, session in self.sessions.items():
-            try:
-                await session.__aexit__(None, None, None)
-            except:
-                pass
+        for task in list(self._startup_tasks):
+            task.cancel()
+        for stop in self._stop_events.values():
+            stop.set()
+        tasks = list(self._server_tasks.values())
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=5)
+            for task in pending:
+                task.cancel()
+        self._startup_tasks.clear()
+        self._server_tasks.clear()
+        self._stop_events.clear()
+        self._ready.clear()
         self.sessions.clear()
+        self.lazy_servers.clear()
+        self.result_caches.clear()
         self.available_tools.clear()
+        if self.on_tools_changed:
+            self.on_tools_changed("")
     
     async def call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
         """Call an MCP tool"""
-        if server_name not in self.sessions:
+        cache = self.result_caches.get(server_name)
+        cache_key = None
+        if cache and cache.enabled_for(tool_name):
+            cache_key = cache.make_key(tool_name, arguments)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        if server_name not in self.sessions and not await self.ensure_connected(server_name):
             return {"error": f"Server {server_name} not connected"}
         
         try:
             session = self.sessions[server_name]
             result = await session.call_tool(tool_name, arguments)
+            if cache_key is not None and not getattr(result, 'isError', False):
+                cache.put(cache_key, result)
             return result
         except Exception as e:
             return {"error": str(e)}
@@ -199,146 +745,774 @@ class MCPManager:
         
         return description
 
+def estimate_tokens(text: str) -> int:
+    """Rough token count for a piece of text (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+class ContextWindow:
+    """Keep system messages plus the most recent turns within a token budget"""
+    MESSAGE_OVERHEAD = 4
+    
+    def __init__(self, max_tokens: int = 4096, summary_tokens: int = 512):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.system: List[Dict] = []
+        self.system_tokens = 0
+        self.window: deque = deque()
+        self.window_tokens = 0
+        self.summary: deque = deque()
+        self.summary_size = 0
+    
+    def _count(self, message: Dict) -> int:
+        return estimate_tokens(message.get('content', '')) + self.MESSAGE_OVERHEAD
+    
+    def reset(self, system_messages: Optional[List[Dict]] = None):
+        """Drop all turns and the summary, keeping the given system messages"""
+        self.system = list(system_messages or [])
+        self.window.clear()
+        self.window_tokens = 0
+        self.summary.clear()
+        self.summary_size = 0
+        self.reset_system_tokens()
+    
+    def reset_system_tokens(self):
+        """Recount system message tokens after one was edited in place"""
+        self.system_tokens = sum(self._count(msg) for msg in self.system)
+        self._evict()
+    
+    def append(self, message: Dict):
+        """Add a message, evicting the oldest turns if the budget is exceeded"""
+        if message.get('role') == 'system':
+            self.system.append(message)
+            self.system_tokens += self._count(message)
+            return
+        tokens = self._count(message)
+        self.window.append((message, tokens))
+        self.window_tokens += tokens
+        self._evict()
+    
+    def _evict(self):
+        budget = self.max_tokens - self.system_tokens - self.summary_tokens
+        while len(self.window) > 1 and self.window_tokens > budget:
+            self._fold(*self.window.popleft())
+            # Don't leave an assistant reply at the start of the window without its question
+            while len(self.window) > 1 and self.window[0][0].get('role') != 'user':
+                self._fold(*self.window.popleft())
+    
+    def _fold(self, message: Dict, tokens: int):
+        """Move an evicted message into the rolling summary"""
+        self.window_tokens -= tokens
+        content = " ".join(message.get('content', '').split())
+        if len(content) > 200:
+            content = content[:200] + "..."
+        line = f"- {message.get('role', 'user')}: {content}"
+        self.summary.append((line, estimate_tokens(line)))
+        self.summary_size += self.summary[-1][1]
+        while len(self.summary) > 1 and self.summary_size > self.summary_tokens:
+            self.summary_size -= self.summary.popleft()[1]
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.system_tokens + self.summary_size + self.window_tokens
+    
+    def messages(self) -> List[Dict]:
+        """Messages to send to the model for the next request"""
+        messages = list(self.system)
+        if self.summary:
+            summary = "\n".join(line for line, _ in self.summary)
+            messages.append({
+                "role": "system",
+                "content": f"Summary of earlier conversation:\n{summary}"
+            })
+        messages.extend(message for message, _ in self.window)
+        return messages
+
+class ToolCallScanner:
+    """Incrementally find complete {"mcp_call": ...} JSON objects in streamed text.
+    
+    Once at least one call has been seen, prose after it marks the scanner
+    finished so the caller can stop reading the rest of the generation.
+    """
+    KEY = '"mcp_call"'
+    
+    def __init__(self):
+        self.calls_found = 0
+        self.finished = False
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[str] = None
+    
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume more text; returns the tool calls completed within it"""
+        calls: List[Dict[str, Any]] = []
+        i = 0
+        n = len(text)
+        while i < n and not self.finished:
+            if self._depth == 0:
+                start = text.find('{', i)
+                between = text[i:start if start != -1 else n]
+                if self.calls_found and between.replace('json', '').strip(' \t\r\n,[]`'):
+                    self.finished = True
+                    break
+                if start == -1:
+                    break
+                self._buffer = ['{']
+                self._key = ""
+                i = start + 1
+                self._depth = 1
+            begin = i
+            dropped = False
+            while i < n:
+                char = text[i]
+                if self._key is not None:
+                    # A candidate must open with the "mcp_call" key; drop stray braces in prose
+                    if not self._key and char.isspace():
+                        i += 1
+                        continue
+                    if not self.KEY.startswith(self._key + char):
+                        self._depth = 0
+                        self._key = None
+                        dropped = True
+                        break
+                    self._key += char
+                    i += 1
+                    if self._key == self.KEY:
+                        self._key = None
+                    continue
+                i += 1
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == '\\':
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char == '{':
+                    self._depth += 1
+                elif char == '}':
+                    self._depth -= 1
+                    if self._depth == 0:
+                        break
+            if dropped:
+                # Rescan from the character that ruled the candidate out
+                continue
+            self._buffer.append(text[begin:i])
+            if self._depth == 0:
+                found = self._parse("".join(self._buffer))
+                self.calls_found += len(found)
+                calls.extend(found)
+        return calls
+    
+    @staticmethod
+    def _parse(candidate: str) -> List[Dict[str, Any]]:
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            return []
+        if not isinstance(data, dict):
+            return []
+        mcp_call = data.get("mcp_call")
+        if isinstance(mcp_call, dict):
+            return [mcp_call]
+        if isinstance(mcp_call, list):
+            return [call for call in mcp_call if isinstance(call, dict)]
+        return []
+
+def tool_result_json(result: Any) -> Any:
+    """Convert an MCP tool result into JSON-serialisable data"""
+    if hasattr(result, 'model_dump'):
+        return result.model_dump(mode='json', exclude_none=True)
+    return result
+
+def find_tool_calls(text: str) -> List[Dict[str, Any]]:
+    """Return every complete mcp_call object in a full response"""
+    return ToolCallScanner().feed(text)
+
+class StreamConsumer:
+    """Accumulate streamed NDJSON chunks and write tokens to the terminal in batches"""
+    def __init__(self, out=None, flush_interval: float = 0.05, flush_size: int = 512):
+        self.out = out or sys.stdout
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.parts: List[str] = []
+        self.final_chunk: Optional[Dict[str, Any]] = None
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._last_flush = time.monotonic()
+    
+    def feed_line(self, line: str) -> Optional[Dict[str, Any]]:
+        """Parse one NDJSON line and buffer its content; returns the parsed chunk"""
+        if not line:
+            return None
+        try:
+            chunk = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        if 'message' in chunk:
+            self.add(chunk['message'].get('content', ''))
+        if chunk.get('done'):
+            self.final_chunk = chunk
+        return chunk
+    
+    def add(self, content: str):
+        """Buffer a piece of content, flushing when the size or time cadence is reached"""
+        if not content:
+            return
+        # The first token goes out immediately so batching never delays time-to-first-token
+        first = not self.parts
+        self.parts.append(content)
+        self._pending.append(content)
+        self._pending_size += len(content)
+        if first or self._pending_size >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        """Write any buffered content to the terminal"""
+        if self._pending:
+            self.out.write("".join(self._pending))
+            self.out.flush()
+            self._pending.clear()
+            self._pending_size = 0
+        self._last_flush = time.monotonic()
+    
+    @property
+    def text(self) -> str:
+        """Full response accumulated so far"""
+        return "".join(self.parts)
+
+class SessionStats:
+    """Per-turn timings from Ollama's final chunk plus client-side measurements.
+    
+    Only the last turn and running totals are kept in memory; with a metrics
+    file configured every turn is also appended to it as one JSON line.
+    """
+    FIELDS = ('total_duration', 'load_duration', 'prompt_eval_count', 'prompt_eval_duration', 'eval_count', 'eval_duration')
+    
+    def __init__(self, metrics_file: Optional[Path] = None):
+        self.metrics_file = metrics_file
+        self.last: Optional[Dict[str, Any]] = None
+        self.turns = 0
+        self.totals: Dict[str, float] = dict.fromkeys(self.FIELDS + ('ttft', 'ttft_turns', 'mcp_calls', 'mcp_latency'), 0)
+    
+    def record(self, model: str, final_chunk: Dict[str, Any], ttft: Optional[float] = None,
+               mcp_latencies: Optional[List[float]] = None) -> Dict[str, Any]:
+        """Store one model request; durations stay in nanoseconds as Ollama reports them"""
+        turn: Dict[str, Any] = {"timestamp": datetime.now().isoformat(timespec="seconds"), "model": model}
+        for field in self.FIELDS:
+            turn[field] = final_chunk.get(field, 0)
+            self.totals[field] += turn[field]
+        turn["ttft"] = ttft
+        if ttft is not None:
+            self.totals["ttft"] += ttft
+            self.totals["ttft_turns"] += 1
+        turn["mcp_latencies"] = mcp_latencies or []
+        self.totals["mcp_calls"] += len(turn["mcp_latencies"])
+        self.totals["mcp_latency"] += sum(turn["mcp_latencies"])
+        self.turns += 1
+        self.last = turn
+        
+        if self.metrics_file:
+            try:
+                with open(self.metrics_file, 'a') as f:
+                    f.write(json.dumps(turn) + "\n")
+            except OSError as e:
+                print(f"⚠️  Could not write metrics: {e}")
+        return turn
+    
+    @staticmethod
+    def _rate(count: float, duration_ns: float) -> str:
+        return f"{count / (duration_ns / 1e9):.1f} tokens/s" if duration_ns else "n/a"
+    
+    @classmethod
+    def _format(cls, data: Dict[str, Any], ttft: Optional[float], mcp_calls: float, mcp_latency: float) -> List[str]:
+        total = data['total_duration']
+        share = f", {data['prompt_eval_duration'] / total:.0%} of total" if total else ""
+        lines = [
+            f"  Generation: {data['eval_count']} tokens in {data['eval_duration'] / 1e9:.2f}s ({cls._rate(data['eval_count'], data['eval_duration'])})",
+            f"  Prompt eval: {data['prompt_eval_count']} tokens in {data['prompt_eval_duration'] / 1e9:.2f}s "
+            f"({cls._rate(data['prompt_eval_count'], data['prompt_eval_duration'])}{share})",
+            f"  Model load: {data['load_duration'] / 1e9:.2f}s · total {total / 1e9:.2f}s"
+        ]
+        if ttft is not None:
+            lines.append(f"  First token: {ttft * 1000:.0f} ms")
+        if mcp_calls:
+            lines.append(f"  MCP tools: {mcp_calls:g} call{'s' if mcp_calls != 1 else ''}, {mcp_latency / mcp_calls * 1000:.0f} ms average")
+        return lines
+    
+    def report(self) -> str:
+        """Last turn and session aggregates for /stats"""
+        if not self.last:
+            return "📊 No turns recorded yet"
+        last = self.last
+        lines = [f"📊 Last turn ({last['model']}):"]
+        lines += self._format(last, last['ttft'], len(last['mcp_latencies']), sum(last['mcp_latencies']))
+        totals = self.totals
+        ttft = totals['ttft'] / totals['ttft_turns'] if totals['ttft_turns'] else None
+        lines.append(f"\n📊 Session ({self.turns} turn{'s' if self.turns != 1 else ''}):")
+        lines += [line.replace("First token:", "First token (avg):")
+                  for line in self._format(totals, ttft, totals['mcp_calls'], totals['mcp_latency'])]
+        if self.metrics_file:
+            lines.append(f"  Metrics file: {self.metrics_file}")
+        return "\n".join(lines)
+
+class ModelCatalog:
+    """Installed models from /api/tags, cached in memory and on disk per Ollama URL.
+    
+    Listings are served from the cache; once it is older than the TTL a
+    refresh runs in the background so pulls and deletes show up shortly.
+    """
+    def __init__(self, cache_file: Path, base_url: str, ttl: float, fetch: Callable):
+        self.cache_file = cache_file
+        self.base_url = base_url
+        self.ttl = ttl
+        self.fetch = fetch
+        self.models: List[Dict[str, Any]] = []
+        self.fetched_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                entry = json.load(f).get(self.base_url, {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            return
+        self.models = entry.get('models', [])
+        self.fetched_at = entry.get('fetched_at', 0.0)
+    
+    def _save(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        data[self.base_url] = {'fetched_at': self.fetched_at, 'models': self.models}
+        try:
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            pass
+    
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+    
+    @property
+    def names(self) -> List[str]:
+        return [model['name'] for model in self.models]
+    
+    def invalidate(self):
+        """Force the next listing to refresh"""
+        self.fetched_at = 0.0
+    
+    async def refresh(self) -> Optional[Dict[str, List[str]]]:
+        """Fetch the model list now; returns the added/removed names, or None if it failed"""
+        models = await self.fetch()
+        if models is None:
+            return None
+        old = {model['name']: model.get('digest') for model in self.models}
+        new = {model['name']: model.get('digest') for model in models}
+        changes = {
+            'added': [name for name in new if name not in old],
+            'removed': [name for name in old if name not in new],
+            'updated': [name for name in new if name in old and new[name] != old[name]]
+        }
+        self.models = models
+        self.fetched_at = time.time()
+        self._save()
+        return changes
+    
+    def refresh_in_background(self):
+        """Start a refresh unless one is already running"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        had_models = bool(self.models)
+        self._refresh_task = asyncio.create_task(self.refresh())
+        
+        def report(task: asyncio.Task):
+            if task.cancelled() or task.exception() or not had_models:
+                return
+            changes = task.result()
+            if changes and (changes['added'] or changes['removed']):
+                parts = [f"+{name}" for name in changes['added']] + [f"-{name}" for name in changes['removed']]
+                print(f"\n📚 Model list changed: {', '.join(parts)}")
+        self._refresh_task.add_done_callback(report)
+    
+    async def get(self, background: bool = True) -> List[Dict[str, Any]]:
+        """Current model list; stale entries are refreshed in the background (or now)"""
+        if not self.models:
+            await self.refresh()
+        elif self.age > self.ttl:
+            if background:
+                self.refresh_in_background()
+            else:
+                await self.refresh()
+        return self.models
+
+def format_size(size: Optional[int]) -> str:
+    """Human-readable size for model listings"""
+    if not size:
+        return "?"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
 class OllamaAssistant:
     def __init__(self, config: Config, mcp_manager: Optional[MCPManager] = None):
         self.config = config
         self.model = config.model
         self.base_url = config.base_url
         self.conversation_history: List[Dict] = []
+        self.conversation_id: Optional[int] = None
+        self.context = ContextWindow(config.context_tokens, config.summary_tokens)
         self.mcp_manager = mcp_manager
+        self._client: Optional[httpx.AsyncClient] = None
+        self.max_connections = 10
+        self.catalog = ModelCatalog(config.models_cache_file, self.base_url, config.model_cache_ttl, self._fetch_models)
+        self.cache_responses = config.response_cache
+        self._preload_task: Optional[asyncio.Task] = None
+        self._streaming = False
+        self._response_cache: Optional[ResponseCache] = None
+        self._tool_semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = SessionStats(Path(config.metrics_file).expanduser() if config.metrics_file else None)
+        self._tool_latencies: List[float] = []
+        # Error message of the last chat turn that failed to reach Ollama, if any
+        self.last_error: Optional[str] = None
         
-        # Add system prompt with MCP tools description
-        system_content = config.system_prompt
-        if mcp_manager and config.mcp_enabled:
-            system_content += mcp_manager.get_tools_description()
+        self._system_message: Optional[Dict] = None
+        self.refresh_system_prompt()
+        if mcp_manager:
+            mcp_manager.on_tools_changed = self.refresh_system_prompt
+    
+    def _system_content(self) -> str:
+        """Build the system prompt, including the MCP tools description"""
+        system_content = self.config.system_prompt
+        if self.mcp_manager and self.config.mcp_enabled:
+            system_content += self.mcp_manager.get_tools_description()
             system_content += "\n\nWhen you need to use an MCP tool, respond with a JSON object: {\"mcp_call\": {\"server\": \"server_name\", \"tool\": \"tool_name\", \"arguments\": {...}}}"
-        
-        if system_content:
-            self.conversation_history.append({
-                "role": "system",
-                "content": system_content
-            })
-        
-    def check_ollama_running(self) -> bool:
+            system_content += "\nTo call several tools at once, write one such object per call in the same reply."
+        return system_content
+    
+    def refresh_system_prompt(self, *_):
+        """Rebuild the system prompt, e.g. after an MCP server finishes connecting"""
+        system_content = self._system_content()
+        if self._system_message is not None:
+            self._system_message["content"] = system_content
+            self.context.reset_system_tokens()
+        elif system_content:
+            self._system_message = {"role": "system", "content": system_content}
+            self.conversation_history.insert(0, self._system_message)
+            self.context.system.insert(0, self._system_message)
+            self.context.reset_system_tokens()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client with keep-alive pooling, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(120.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=max(5, self.max_connections // 2),
+                    keepalive_expiry=60.0
+                )
+            )
+        return self._client
+    
+    async def close(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def check_ollama_running(self) -> bool:
         """Check if Ollama is running and accessible"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
+            response = await self.client.get("/api/tags", timeout=2)
             return response.status_code == 200
-        except requests.exceptions.RequestException:
+        except httpx.HTTPError:
             return False
     
-    def list_models(self) -> List[str]:
-        """List available Ollama models"""
+    async def _fetch_models(self) -> Optional[List[Dict[str, Any]]]:
+        """Fetch installed models from /api/tags; None if Ollama can't be reached"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                return [model['name'] for model in models]
-            return []
-        except requests.exceptions.RequestException:
-            return []
+            response = await self.client.get("/api/tags", timeout=5)
+            if response.status_code != 200:
+                return None
+            return [
+                {
+                    'name': model['name'],
+                    'size': model.get('size'),
+                    'digest': model.get('digest'),
+                    'modified_at': model.get('modified_at')
+                }
+                for model in response.json().get('models', [])
+            ]
+        except (httpx.HTTPError, ValueError, KeyError):
+            return None
+    
+    async def list_models(self, background: bool = True) -> List[str]:
+        """List available Ollama models from the model catalog"""
+        await self.catalog.get(background)
+        return self.catalog.names
+    
+    def add_message(self, role: str, content: str):
+        """Record a message in the full history and the context window"""
+        message = {"role": role, "content": content}
+        self.conversation_history.append(message)
+        self.context.append(message)
+    
+    @property
+    def response_cache(self) -> ResponseCache:
+        """On-disk response cache, opened on first use"""
+        if self._response_cache is None:
+            self._response_cache = ResponseCache(self.config.response_cache_db, self.config.response_cache_size)
+        return self._response_cache
+    
+    async def _request_chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Non-streaming /api/chat request, answered from the response cache when allowed"""
+        key = None
+        if self.cache_responses or ResponseCache.is_deterministic(payload.get("options")):
+            key = ResponseCache.make_key(payload)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+        response = await self.client.post("/api/chat", json=payload)
+        response.raise_for_status()
+        result = response.json()
+        if key is not None:
+            self.response_cache.put(key, result)
+        return result
+    
+    async def preload_model(self, model: Optional[str] = None) -> Optional[float]:
+        """Load a model into Ollama's memory; returns the seconds it took, or None on failure"""
+        payload = {"model": model or self.model, "messages": [], "stream": False}
+        # Load-time options like num_ctx must match a real turn's, or Ollama reloads the runner for it
+        if self.config.options:
+            payload["options"] = self.config.options
+        if self.config.keep_alive is not None:
+            payload["keep_alive"] = self.config.keep_alive
+        started = time.perf_counter()
+        try:
+            response = await self.client.post("/api/chat", json=payload, timeout=httpx.Timeout(300.0, connect=5.0))
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return None
+        return time.perf_counter() - started
+    
+    def preload_in_background(self):
+        """Warm the current model without blocking the prompt"""
+        if self._preload_task is not None and not self._preload_task.done():
+            self._preload_task.cancel()
+        model = self.model
+        self._preload_task = asyncio.create_task(self.preload_model(model))
+        
+        def report(task: asyncio.Task):
+            # Stay quiet mid-answer; the turn reports its own load time
+            if task.cancelled() or task.exception() or task.result() is None or self._streaming:
+                return
+            print(f"\n🔥 {model} loaded in {task.result():.2f}s")
+        self._preload_task.add_done_callback(report)
+    
+    @staticmethod
+    def _report_load_time(final_chunk: Dict[str, Any]):
+        """Show model load time apart from generation time when a turn had to load the model"""
+        load = final_chunk.get('load_duration', 0) / 1e9
+        if load < 0.5:
+            return
+        generation = (final_chunk.get('prompt_eval_duration', 0) + final_chunk.get('eval_duration', 0)) / 1e9
+        print(f"⏱️  Model load {load:.2f}s · generation {generation:.2f}s\n")
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with the configured embedding model"""
+        response = await self.client.post("/api/embed", json={"model": self.config.embed_model, "input": texts})
+        response.raise_for_status()
+        return response.json().get('embeddings', [])
+    
+    async def complete(self, messages: List[Dict], model: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """One-off non-streaming /api/chat request outside the conversation; returns the raw result"""
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": False
+        }
+        options = {**self.config.options, **(options or {})}
+        if options:
+            payload["options"] = options
+        if self.config.keep_alive is not None:
+            payload["keep_alive"] = self.config.keep_alive
+        return await self._request_chat(payload)
     
     async def chat(self, message: str, stream: bool = True) -> str:
         """Send a message to Ollama and get response"""
-        self.conversation_history.append({
-            "role": "user",
-            "content": message
-        })
+        self.last_error = None
+        self.add_message("user", message)
         
         payload = {
             "model": self.model,
-            "messages": self.conversation_history,
+            "messages": self.context.messages(),
             "stream": stream
         }
+        if self.config.options:
+            payload["options"] = self.config.options
+        if self.config.keep_alive is not None:
+            payload["keep_alive"] = self.config.keep_alive
         
         try:
-            response = requests.post(
-                f"{self.base_url}/api/chat",
-                json=payload,
-                stream=stream,
-                timeout=120
-            )
-            
             if stream:
-                full_response = ""
                 print("\n🤖 Assistant: ", end="", flush=True)
                 
-                for line in response.iter_lines():
-                    if line:
-                        try:
-                            chunk = json.loads(line)
-                            if 'message' in chunk:
-                                content = chunk['message'].get('content', '')
-                                print(content, end="", flush=True)
-                                full_response += content
-                        except json.JSONDecodeError:
-                            continue
+                consumer = StreamConsumer()
+                scanner = ToolCallScanner() if self.mcp_manager else None
+                mcp_calls: List[Dict[str, Any]] = []
+                tool_tasks: List[asyncio.Task] = []
+                self._streaming = True
+                self._tool_latencies = []
+                ttft = None
+                started = time.perf_counter()
+                try:
+                    async with self.client.stream("POST", "/api/chat", json=payload) as response:
+                        if response.is_error:
+                            await response.aread()
+                            response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            chunk = consumer.feed_line(line)
+                            if ttft is None and consumer.parts:
+                                ttft = time.perf_counter() - started
+                            if scanner and chunk and 'message' in chunk:
+                                # Start each tool as soon as its call is complete
+                                for mcp_call in scanner.feed(chunk['message'].get('content', '')):
+                                    mcp_calls.append(mcp_call)
+                                    tool_tasks.append(asyncio.create_task(self._run_tool_call(mcp_call)))
+                                if scanner.finished:
+                                    # Closing the response stops the rest of the generation upstream
+                                    break
+                except BaseException:
+                    for task in tool_tasks:
+                        task.cancel()
+                    raise
+                finally:
+                    self._streaming = False
+                    consumer.flush()
+                full_response = consumer.text
                 
                 print("\n")
+                if consumer.final_chunk:
+                    self._report_load_time(consumer.final_chunk)
                 
-                # Check if response contains MCP call
-                if self.mcp_manager and "mcp_call" in full_response:
-                    mcp_result = await self._handle_mcp_call(full_response)
-                    if mcp_result:
-                        return await self.chat(f"Here's the result from the tool: {mcp_result}", stream=False)
+                self.add_message("assistant", full_response)
+                if mcp_calls:
+                    mcp_result = await self._handle_mcp_calls(mcp_calls, tool_tasks)
+                    # A stream cut short at the tool call has no final chunk; the turn still counts
+                    self.stats.record(self.model, consumer.final_chunk or {}, ttft, self._tool_latencies)
+                    return await self.chat(mcp_result, stream=stream)
                 
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": full_response
-                })
+                self.stats.record(self.model, consumer.final_chunk or {}, ttft)
                 return full_response
             else:
-                result = response.json()
+                result = await self._request_chat(payload)
                 assistant_message = result.get('message', {}).get('content', '')
                 
-                # Check if response contains MCP call
+                self.add_message("assistant", assistant_message)
+                # Check if response contains MCP calls
                 if self.mcp_manager and "mcp_call" in assistant_message:
-                    mcp_result = await self._handle_mcp_call(assistant_message)
-                    if mcp_result:
-                        return await self.chat(f"Here's the result from the tool: {mcp_result}", stream=False)
+                    mcp_calls = find_tool_calls(assistant_message)
+                    if mcp_calls:
+                        self._tool_latencies = []
+                        tool_tasks = [asyncio.create_task(self._run_tool_call(mcp_call)) for mcp_call in mcp_calls]
+                        mcp_result = await self._handle_mcp_calls(mcp_calls, tool_tasks)
+                        self.stats.record(self.model, result, mcp_latencies=self._tool_latencies)
+                        return await self.chat(mcp_result, stream=False)
                 
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": assistant_message
-                })
+                self.stats.record(self.model, result)
                 return assistant_message
                 
-        except requests.exceptions.RequestException as e:
-            return f"Error communicating with Ollama: {str(e)}"
+        except httpx.HTTPError as e:
+            # There is no upfront health check, so the first request reports an unreachable server
+            error = self.describe_error(e)
+            self.last_error = error
+            if stream:
+                print(f"{error}\n")
+            return error
     
-    async def _handle_mcp_call(self, response: str) -> Optional[str]:
-        """Parse and execute MCP tool calls from AI response"""
-        try:
-            # Try to extract JSON from response
-            start = response.find("{\"mcp_call\"")
-            if start == -1:
-                return None
-            
-            end = response.find("}", start)
-            json_str = response[start:end+1]
-            
-            call_data = json.loads(json_str)
-            mcp_call = call_data.get("mcp_call", {})
-            
-            server = mcp_call.get("server")
-            tool = mcp_call.get("tool")
-            arguments = mcp_call.get("arguments", {})
-            
-            print(f"\n🔧 Calling MCP tool: {server}:{tool}")
-            result = await self.mcp_manager.call_tool(server, tool, arguments)
-            print(f"✅ Tool result received\n")
-            
-            return json.dumps(result)
-        except Exception as e:
-            print(f"❌ Error handling MCP call: {str(e)}")
-            return None
+    @staticmethod
+    def is_fatal(error: Exception) -> bool:
+        """Whether an error means no further request can succeed: Ollama is down or the model is gone"""
+        return isinstance(error, httpx.ConnectError) or (
+            isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 404
+        )
+    
+    def describe_error(self, error: Exception) -> str:
+        """User-facing message for a failed Ollama request"""
+        if isinstance(error, httpx.ConnectError):
+            return f"❌ Cannot connect to Ollama at {self.base_url}. Run: ollama serve"
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 404:
+            # The model may have been deleted since the catalog was cached
+            self.catalog.invalidate()
+            return f"❌ Model {self.model} not found. Use /models to see installed models."
+        return f"Error communicating with Ollama: {str(error) or type(error).__name__}"
+    
+    @property
+    def tool_semaphore(self) -> asyncio.Semaphore:
+        """Caps how many MCP tool calls run at once"""
+        if self._tool_semaphore is None:
+            self._tool_semaphore = asyncio.Semaphore(self.config.mcp_max_concurrent_calls)
+        return self._tool_semaphore
+    
+    async def _run_tool_call(self, mcp_call: Dict[str, Any]) -> Any:
+        """Execute one MCP tool call parsed from the AI response"""
+        latencies = self._tool_latencies
+        async with self.tool_semaphore:
+            started = time.perf_counter()
+            try:
+                return await self.mcp_manager.call_tool(
+                    mcp_call.get("server"),
+                    mcp_call.get("tool"),
+                    mcp_call.get("arguments", {})
+                )
+            except Exception as e:
+                return {"error": str(e)}
+            finally:
+                latencies.append(time.perf_counter() - started)
+    
+    async def _handle_mcp_calls(self, mcp_calls: List[Dict[str, Any]], tool_tasks: List[asyncio.Task]) -> str:
+        """Wait for the tool calls of one turn and combine their results into one message"""
+        names = ", ".join(f"{call.get('server')}:{call.get('tool')}" for call in mcp_calls)
+        print(f"🔧 Calling MCP tool{'s' if len(mcp_calls) > 1 else ''}: {names}")
+        results = [
+            {"error": str(result) or type(result).__name__} if isinstance(result, BaseException) else tool_result_json(result)
+            for result in await asyncio.gather(*tool_tasks, return_exceptions=True)
+        ]
+        print(f"✅ Tool result{'s' if len(mcp_calls) > 1 else ''} received\n")
+        
+        if len(mcp_calls) == 1:
+            return f"Here's the result from the tool: {json.dumps(results[0], default=str)}"
+        parts = [
+            f"{i}. {call.get('server')}:{call.get('tool')}\n{json.dumps(result, default=str)}"
+            for i, (call, result) in enumerate(zip(mcp_calls, results), 1)
+        ]
+        return "Here are the results from the tools:\n\n" + "\n\n".join(parts)
     
     def clear_history(self):
         """Clear conversation history"""
         system_messages = [msg for msg in self.conversation_history if msg.get('role') == 'system']
         self.conversation_history = system_messages
+        self.conversation_id = None
+        self.context.reset(system_messages)
         print("💭 Conversation history cleared.")
     
+    def save_conversation(self):
+        """Persist new messages of the current conversation"""
+        self.conversation_id = self.config.save_conversation(self.conversation_history, self.conversation_id, self.model)
+    
     def get_system_info(self) -> str:
         """Get system information"""
         info = f"""System Information:
@@ -351,21 +1525,106 @@ class OllamaAssistant:
 """
         return info
 
-def execute_shell_command(command: str) -> tuple[str, int]:
-    """Execute a shell command and return output"""
+class OutputCapture:
+    """Keep the head and tail of a command's output, dropping the middle"""
+    def __init__(self, max_chars: int = 8000):
+        self.head_chars = max_chars // 2
+        self.tail_chars = max_chars - self.head_chars
+        self.head: List[str] = []
+        self.head_size = 0
+        self.tail: deque = deque()
+        self.tail_size = 0
+        self.total = 0
+    
+    def write(self, text: str):
+        self.total += len(text)
+        if self.head_size < self.head_chars:
+            part = text[:self.head_chars - self.head_size]
+            self.head.append(part)
+            self.head_size += len(part)
+            text = text[len(part):]
+        if text:
+            self.tail.append(text)
+            self.tail_size += len(text)
+            while self.tail_size - len(self.tail[0]) >= self.tail_chars:
+                self.tail_size -= len(self.tail.popleft())
+    
+    def text(self) -> str:
+        head = "".join(self.head)
+        tail = "".join(self.tail)
+        if len(tail) > self.tail_chars:
+            tail = tail[-self.tail_chars:]
+        omitted = self.total - len(head) - len(tail)
+        if omitted > 0:
+            return f"{head}\n... [{omitted} characters omitted] ...\n{tail}"
+        return head + tail
+
+async def execute_shell_command(command: str, timeout: Optional[float] = 300, capture_chars: int = 8000) -> tuple[str, int]:
+    """Execute a shell command, streaming its output live.
+    
+    Returns the head and tail of the output (at most capture_chars) and the
+    exit code. Ctrl-C or the timeout kills only the command, not the CLI.
+    """
+    capture = OutputCapture(capture_chars)
+    posix = os.name == 'posix'
     try:
-        result = subprocess.run(
+        process = await asyncio.create_subprocess_shell(
             command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=30
+            stdin=subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            # Own process group, so the whole pipeline can be killed at once
+            start_new_session=posix
         )
-        return result.stdout + result.stderr, result.returncode
-    except subprocess.TimeoutExpired:
-        return "Command timed out after 30 seconds", 1
     except Exception as e:
         return f"Error executing command: {str(e)}", 1
+    
+    stopped_by = None
+    
+    def kill(reason: str):
+        nonlocal stopped_by
+        if stopped_by is not None or process.returncode is not None:
+            return
+        stopped_by = reason
+        try:
+            if posix:
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+    
+    async def pump(stream: asyncio.StreamReader, out):
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        while True:
+            data = await stream.read(65536)
+            text = decoder.decode(data, final=not data)
+            if text:
+                out.write(text)
+                out.flush()
+                capture.write(text)
+            if not data:
+                return
+    
+    loop = asyncio.get_running_loop()
+    previous_handler = signal.getsignal(signal.SIGINT)
+    signal.signal(signal.SIGINT, lambda *_: loop.call_soon_threadsafe(kill, "cancelled"))
+    timer = loop.call_later(timeout, kill, "timeout") if timeout else None
+    try:
+        await asyncio.gather(pump(process.stdout, sys.stdout), pump(process.stderr, sys.stderr))
+        returncode = await process.wait()
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        if timer:
+            timer.cancel()
+        kill("cancelled")
+    
+    output = capture.text()
+    if stopped_by == "timeout":
+        output += f"\nCommand timed out after {timeout:g} seconds"
+    elif stopped_by == "cancelled":
+        output += "\nCommand cancelled"
+    return output, returncode
 
 def read_file(filepath: str) -> str:
     """Read file contents"""
@@ -382,6 +1641,299 @@ def read_file(filepath: str) -> str:
     except Exception as e:
         return f"❌ Error reading file: {str(e)}"
 
+def chunk_offsets(data, chunk_bytes: int) -> List[tuple[int, int]]:
+    """Split a buffer into (start, end) ranges of about chunk_bytes, ending on line breaks where possible"""
+    offsets = []
+    start = 0
+    size = len(data)
+    while start < size:
+        end = min(start + chunk_bytes, size)
+        if end < size:
+            newline = data.rfind(b'\n', start, end)
+            if newline > start:
+                end = newline + 1
+            else:
+                # No line break in range: at least avoid cutting a UTF-8 sequence
+                while end > start + 1 and (data[end] & 0xC0) == 0x80:
+                    end -= 1
+        offsets.append((start, end))
+        start = end
+    return offsets
+
+async def map_reduce_file(assistant: OllamaAssistant, path: Path, question: str):
+    """Answer a question about a file too large for one prompt.
+    
+    The file is memory-mapped and split into context-sized chunks; each chunk
+    is asked about separately with a bounded number of concurrent requests
+    (map), the partial answers are merged until they fit in one prompt
+    (reduce), and the final answer is streamed as a normal chat turn.
+    """
+    budget = max(assistant.config.context_tokens // 2, 256)
+    max_parallel = max(1, assistant.config.read_max_parallel)
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offsets = chunk_offsets(data, budget * 4)
+        total = len(offsets)
+        print(f"🗂️  Processing {path.name} in {total} chunks ({max_parallel} at a time)...")
+        
+        notes: List[Optional[str]] = [None] * total
+        next_chunk = 0
+        done = 0
+        failed = 0
+        fatal: Optional[Exception] = None
+        last_failure: Optional[Exception] = None
+        
+        async def worker():
+            nonlocal next_chunk, done, failed, fatal, last_failure
+            while next_chunk < total and fatal is None:
+                index = next_chunk
+                next_chunk += 1
+                start, end = offsets[index]
+                text = data[start:end].decode('utf-8', errors='ignore')
+                messages = [
+                    {"role": "system", "content": f"You are reading part {index + 1} of {total} of the file {path.name}. "
+                                                  "Extract only what helps answer the question. "
+                                                  "If this part is irrelevant, reply with exactly: NOTHING"},
+                    {"role": "user", "content": f"{text}\n\nQuestion: {question}"}
+                ]
+                try:
+                    result = await assistant.complete(messages)
+                    answer = result.get('message', {}).get('content', '').strip()
+                except Exception as e:
+                    # Failed parts are counted, never passed on to the model as notes
+                    failed += 1
+                    last_failure = e
+                    if assistant.is_fatal(e):
+                        fatal = e
+                    answer = ""
+                if answer and answer.upper().rstrip('.') != 'NOTHING':
+                    notes[index] = f"[Part {index + 1}] {answer}"
+                done += 1
+                print(f"\r⏳ Mapped {done}/{total} chunks", end="", flush=True)
+        
+        await asyncio.gather(*(worker() for _ in range(min(max_parallel, total))))
+        print()
+    
+    if fatal is not None or failed == total:
+        error = assistant.describe_error(fatal or last_failure)
+        if fatal is None:
+            error = f"❌ All {total} chunks of {path.name} failed. {error}"
+        assistant.last_error = error
+        print(f"{error}\n")
+        return error
+    skipped = ""
+    if failed:
+        print(f"⚠️  {failed} of {total} chunks failed and were skipped")
+        skipped = f", {failed} of which could not be read"
+    
+    partials = [note for note in notes if note]
+    if not partials:
+        return await assistant.chat(f"I searched all of {path} for the answer to \"{question}\" and found nothing relevant. Please say so.")
+    
+    # Reduce: merge groups of notes until everything fits in one prompt
+    semaphore = asyncio.Semaphore(max_parallel)
+    
+    async def merge(group: List[str]) -> str:
+        async with semaphore:
+            messages = [
+                {"role": "system", "content": "Merge these notes into one concise set of notes, keeping every detail relevant to the question."},
+                {"role": "user", "content": "\n\n".join(group) + f"\n\nQuestion: {question}"}
+            ]
+            try:
+                result = await assistant.complete(messages)
+                return result.get('message', {}).get('content', '').strip()
+            except Exception:
+                return "\n".join(group)
+    
+    while len(partials) > 1 and estimate_tokens("\n\n".join(partials)) > budget:
+        groups: List[List[str]] = [[]]
+        size = 0
+        for note in partials:
+            tokens = estimate_tokens(note)
+            if groups[-1] and size + tokens > budget:
+                groups.append([])
+                size = 0
+            groups[-1].append(note)
+            size += tokens
+        if len(groups) == len(partials):
+            # Every note is already too big to pair up; merging won't shrink it further
+            break
+        print(f"🔗 Combining {len(partials)} partial answers...")
+        partials = await asyncio.gather(*(merge(group) for group in groups))
+    
+    notes_text = "\n\n".join(partials)
+    return await assistant.chat(f"Notes extracted from {path} ({total} parts{skipped}):\n\n{notes_text}\n\nUsing these notes, answer: {question}")
+
+class EmbeddingIndex:
+    """Embedding index of a directory's text files, stored under ~/.ollama-cli/index.
+    
+    Vectors live in a NumPy .npy file (normalised float32 rows) next to a
+    JSON file with the chunk texts and per-file mtime/size/hash, so updates
+    only re-embed files whose content changed.
+    """
+    SKIP_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv', '.next', 'dist', 'build', '.mypy_cache', '.pytest_cache'}
+    MAX_FILE_SIZE = 2_000_000
+    CHUNK_CHARS = 1500
+    
+    def __init__(self, root: Path, index_dir: Path, model: str):
+        self.root = root.resolve()
+        self.model = model
+        self.dir = index_dir / hashlib.sha256(str(self.root).encode()).hexdigest()[:16]
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.chunks: List[Dict[str, Any]] = []
+        self.vectors = None
+        self._load()
+    
+    def _load(self):
+        np = load_numpy()
+        try:
+            with open(self.dir / "meta.json", 'r') as f:
+                meta = json.load(f)
+            vectors = np.load(self.dir / "vectors.npy")
+        except (OSError, ValueError):
+            return
+        if meta.get('model') != self.model or len(meta.get('chunks', [])) != len(vectors):
+            return
+        self.files = meta['files']
+        self.chunks = meta['chunks']
+        self.vectors = vectors
+    
+    def _save(self):
+        np = load_numpy()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.dir / "vectors.tmp.npy", 'wb') as f:
+            np.save(f, self.vectors)
+        with open(self.dir / "meta.tmp", 'w') as f:
+            json.dump({'root': str(self.root), 'model': self.model, 'files': self.files, 'chunks': self.chunks}, f)
+        os.replace(self.dir / "vectors.tmp.npy", self.dir / "vectors.npy")
+        os.replace(self.dir / "meta.tmp", self.dir / "meta.json")
+    
+    def _scan(self) -> Dict[str, os.stat_result]:
+        """Candidate text files under the root, keyed by relative path"""
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in self.SKIP_DIRS and not d.startswith('.')]
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                if 0 < stat.st_size <= self.MAX_FILE_SIZE:
+                    found[str(path.relative_to(self.root))] = stat
+        return found
+    
+    @classmethod
+    def _chunk(cls, text: str) -> List[tuple[int, str]]:
+        """Split text into (first line number, text) pieces of about CHUNK_CHARS"""
+        chunks = []
+        lines: List[str] = []
+        size = 0
+        first = 1
+        for number, line in enumerate(text.splitlines(keepends=True), 1):
+            if lines and size + len(line) > cls.CHUNK_CHARS:
+                chunks.append((first, "".join(lines)))
+                lines, size, first = [], 0, number
+            lines.append(line)
+            size += len(line)
+        if lines and "".join(lines).strip():
+            chunks.append((first, "".join(lines)))
+        return chunks
+    
+    async def update(self, embed: Callable, batch_size: int = 32) -> Dict[str, int]:
+        """Bring the index up to date with the directory, embedding only changed files"""
+        np = load_numpy()
+        rows_by_file: Dict[str, List[int]] = {}
+        for row, chunk in enumerate(self.chunks):
+            rows_by_file.setdefault(chunk['file'], []).append(row)
+        
+        keep_rows: List[int] = []
+        new_chunks: List[Dict[str, Any]] = []
+        files: Dict[str, Dict[str, Any]] = {}
+        counts = {'unchanged': 0, 'changed': 0, 'removed': 0}
+        for rel, stat in self._scan().items():
+            old = self.files.get(rel)
+            if old and old['mtime'] == stat.st_mtime and old['size'] == stat.st_size:
+                keep_rows.extend(rows_by_file.get(rel, []))
+                files[rel] = old
+                counts['unchanged'] += 1
+                continue
+            try:
+                raw = (self.root / rel).read_bytes()
+            except OSError:
+                continue
+            if b'\0' in raw[:8192]:
+                continue  # binary
+            digest = hashlib.sha1(raw).hexdigest()
+            files[rel] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha1': digest}
+            if old and old['sha1'] == digest:
+                keep_rows.extend(rows_by_file.get(rel, []))
+                counts['unchanged'] += 1
+                continue
+            for line, text in self._chunk(raw.decode('utf-8', errors='ignore')):
+                new_chunks.append({'file': rel, 'line': line, 'text': text})
+            counts['changed'] += 1
+        counts['removed'] = len(set(self.files) - set(files))
+        
+        new_vectors = []
+        for start in range(0, len(new_chunks), batch_size):
+            batch = new_chunks[start:start + batch_size]
+            new_vectors.extend(await embed([f"{c['file']}\n{c['text']}" for c in batch]))
+            print(f"\r⏳ Embedded {min(start + batch_size, len(new_chunks))}/{len(new_chunks)} chunks", end="", flush=True)
+        if new_chunks:
+            print()
+        
+        parts = []
+        if self.vectors is not None and keep_rows:
+            parts.append(self.vectors[keep_rows])
+        if new_vectors:
+            fresh = np.asarray(new_vectors, dtype=np.float32)
+            norms = np.linalg.norm(fresh, axis=1, keepdims=True)
+            parts.append(fresh / np.where(norms == 0, 1, norms))
+        self.vectors = np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+        self.chunks = [self.chunks[row] for row in keep_rows] + new_chunks
+        self.files = files
+        self._save()
+        return counts
+    
+    def search(self, query_vector: List[float], k: int = 5) -> List[tuple[float, Dict[str, Any]]]:
+        """Top-k chunks by cosine similarity"""
+        np = load_numpy()
+        if self.vectors is None or not len(self.chunks):
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[row]), self.chunks[row]) for row in top]
+
+async def ask_index(assistant: OllamaAssistant, index: EmbeddingIndex, question: str):
+    """Answer a question using only the most relevant indexed chunks as context"""
+    query_vector = (await assistant.embed([question]))[0]
+    hits = index.search(query_vector, assistant.config.ask_top_k)
+    if not hits:
+        print("❌ The index is empty\n")
+        return
+    excerpts = "\n\n".join(
+        f"--- {chunk['file']} (line {chunk['line']}) ---\n{chunk['text']}" for _, chunk in hits
+    )
+    print("📎 Using: " + ", ".join(f"{chunk['file']}:{chunk['line']}" for _, chunk in hits))
+    await assistant.chat(f"Relevant excerpts from {index.root}:\n\n{excerpts}\n\nUsing these excerpts, answer: {question}")
+
+def print_search_results(results: List[Dict[str, Any]]):
+    """Print conversation search hits"""
+    if not results:
+        print("❌ No matching messages\n")
+        return
+    print(f"\n🔎 {len(results)} matching message{'s' if len(results) != 1 else ''}:")
+    for hit in results:
+        snippet = " ".join(hit['snippet'].split())
+        print(f"  #{hit['conversation_id']}.{hit['seq']} [{hit['role']}] {snippet}")
+        print(f"      in \"{hit['title']}\" ({hit['updated_at'][:16].replace('T', ' ')})")
+    print()
+
 def print_banner():
     """Print welcome banner"""
     banner = """
@@ -398,12 +1950,17 @@ def print_help():
 Available Commands:
   /help       - Show this help message
   /clear      - Clear conversation history
-  /models     - List available models
+  /models     - List available models (/models refresh to re-fetch)
   /switch     - Switch to a different model
   /info       - Show system information
+  /stats      - Show timings of the last turn and this session
   /read <file> - Read a file and discuss it
+  /index <dir> - Build or update an embedding index of a directory
+  /ask <question> - Answer using the most relevant indexed chunks
   /exec <cmd> - Execute a shell command (use with caution!)
   /save       - Save current conversation
+  /history [n] - List saved conversations (/history compact [n] to prune)
+  /search <terms> - Search saved conversations
   /config     - Show current configuration
   /system     - Set system prompt
   /mcp        - MCP server management
@@ -414,22 +1971,86 @@ Just type your message to chat with the assistant!
     """
     print(help_text)
 
-async def setup_mcp_servers(config: Config, mcp_manager: MCPManager):
-    """Set up and connect to enabled MCP servers"""
+async def read_input(prompt: str) -> str:
+    """input() that lets background tasks keep running while waiting for the user"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def resolve(result=None, error=None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def reader():
+        try:
+            loop.call_soon_threadsafe(resolve, input(prompt))
+        except Exception as e:
+            loop.call_soon_threadsafe(resolve, None, e)
+    
+    # Daemon thread so a pending input() never blocks interpreter exit
+    threading.Thread(target=reader, daemon=True).start()
+    return await future
+
+async def setup_mcp_servers(config: Config, mcp_manager: MCPManager, wait_all: bool = False):
+    """Connect to enabled MCP servers concurrently.
+    
+    Servers with a cached tool catalog are not started until one of their
+    tools is called (unless mcp_lazy_connect is off). The others connect
+    concurrently; this returns once the first is ready (or every server has
+    finished trying) and the rest keep connecting in the background. Pass
+    wait_all to wait for every server instead.
+    """
     servers = config.load_mcp_servers()
+    enabled = {name: server_config for name, server_config in servers.items() if server_config.get('enabled', False)}
     
     connected = []
-    for name, server_config in servers.items():
-        if server_config.get('enabled', False):
-            print(f"🔌 Connecting to MCP server: {name}...")
-            if await mcp_manager.connect_server(name, server_config):
-                connected.append(name)
-                print(f"✅ Connected to {name}")
-            else:
-                print(f"❌ Failed to connect to {name}")
+    if config.mcp_lazy_connect:
+        for name, server_config in list(enabled.items()):
+            if server_config.get('lazy', True):
+                count = mcp_manager.load_cached_tools(name, server_config)
+                if count:
+                    print(f"📦 Loaded {count} cached tools for {name} (starts on first use)")
+                    connected.append(name)
+                    del enabled[name]
+    if not enabled:
+        if connected:
+            print(f"\n🎯 MCP servers ready: {', '.join(connected)}\n")
+        return connected
+    
+    first_ready = asyncio.Event()
+    
+    async def connect(name: str, server_config: Dict[str, Any]):
+        timeout = server_config.get('timeout', config.mcp_connect_timeout)
+        if await mcp_manager.connect_server(name, server_config, timeout=timeout):
+            connected.append(name)
+            print(f"✅ Connected to {name}")
+            first_ready.set()
+    
+    for name in enabled:
+        print(f"🔌 Connecting to MCP server: {name}...")
+    tasks = [asyncio.create_task(connect(name, server_config)) for name, server_config in enabled.items()]
+    mcp_manager._startup_tasks.update(tasks)
+    for task in tasks:
+        task.add_done_callback(mcp_manager._startup_tasks.discard)
+    
+    all_done = asyncio.ensure_future(asyncio.wait(tasks))
+    waiters = [all_done]
+    if not wait_all:
+        waiters.append(asyncio.ensure_future(first_ready.wait()))
+    await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    for waiter in waiters:
+        if not waiter.done():
+            waiter.cancel()
     
     if connected:
-        print(f"\n🎯 Connected MCP servers: {', '.join(connected)}\n")
+        print(f"\n🎯 MCP servers ready: {', '.join(connected)}")
+    pending = sum(1 for task in tasks if not task.done())
+    if pending:
+        print(f"⏳ {pending} MCP server(s) still starting in the background")
+    print()
     
     return connected
 
@@ -439,14 +2060,23 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
     print(f"📦 Using model: {assistant.model}")
     print(f"🌐 Ollama URL: {assistant.base_url}")
     
+    # Warm the model catalog so /models and /switch answer instantly, and the model itself
+    if assistant.catalog.age > assistant.catalog.ttl:
+        assistant.catalog.refresh_in_background()
+    assistant.preload_in_background()
+    
+    if config.mcp_enabled and not MCP_AVAILABLE:
+        print("⚠️  MCP not available. Install with: pip install mcp")
     if mcp_manager and MCP_AVAILABLE:
         await setup_mcp_servers(config, mcp_manager)
     
     print("💡 Type /help for commands or just start chatting!\n")
+    startup_ready()
+    active_index: Optional[EmbeddingIndex] = None
     
     while True:
         try:
-            user_input = input("👤 You: ").strip()
+            user_input = (await read_input("👤 You: ")).strip()
             
             if not user_input:
                 continue
@@ -462,7 +2092,7 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                     if assistant.conversation_history:
                         save = input("Save this conversation? (y/n): ").strip().lower()
                         if save == 'y':
-                            config.save_conversation(assistant.conversation_history)
+                            assistant.save_conversation()
                             print("✅ Conversation saved!")
                     if mcp_manager:
                         await mcp_manager.disconnect_all()
@@ -476,6 +2106,9 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                     
                 elif command == '/info':
                     print("\n" + assistant.get_system_info())
+                
+                elif command == '/stats':
+                    print("\n" + assistant.stats.report() + "\n")
                     
                 elif command == '/tools':
                     if mcp_manager and mcp_manager.available_tools:
@@ -485,6 +2118,10 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                             print(f"  • {tool_id}")
                             print(f"    Description: {tool.description}")
                             print()
+                        for server_name, cache in mcp_manager.result_caches.items():
+                            print(f"📦 {server_name} result cache: {cache.hits} hits, {cache.misses} misses, {len(cache.entries)} entries")
+                        if mcp_manager.result_caches:
+                            print()
                     else:
                         print("❌ No MCP tools available. Enable MCP servers with /mcp\n")
                     
@@ -532,18 +2169,22 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                             await setup_mcp_servers(config, mcp_manager)
                     
                 elif command == '/models':
-                    models = assistant.list_models()
-                    if models:
+                    if args == 'refresh':
+                        assistant.catalog.invalidate()
+                        await assistant.list_models(background=False)
+                    else:
+                        await assistant.list_models()
+                    if assistant.catalog.models:
                         print("\n📚 Available models:")
-                        for i, model in enumerate(models, 1):
-                            current = "⭐" if model == assistant.model else "  "
-                            print(f"{current} {i}. {model}")
+                        for i, model in enumerate(assistant.catalog.models, 1):
+                            current = "⭐" if model['name'] == assistant.model else "  "
+                            print(f"{current} {i}. {model['name']} ({format_size(model.get('size'))})")
                         print()
                     else:
                         print("❌ No models found.")
                         
                 elif command == '/switch':
-                    models = assistant.list_models()
+                    models = await assistant.list_models()
                     if models:
                         print("\n📚 Available models:")
                         for i, model in enumerate(models, 1):
@@ -556,7 +2197,8 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                                 config.model = models[idx]
                                 config.save()
                                 assistant.clear_history()
-                                print(f"✅ Switched to {assistant.model}\n")
+                                assistant.preload_in_background()
+                                print(f"✅ Switched to {assistant.model} (loading in the background)\n")
                             else:
                                 print("❌ Invalid choice\n")
                         except (ValueError, IndexError):
@@ -568,6 +2210,16 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                     if not args:
                         print("❌ Usage: /read <filepath>\n")
                     else:
+                        path = Path(args).expanduser()
+                        # Files that don't fit in half the context window go through map-reduce
+                        if path.is_file() and path.stat().st_size > config.context_tokens * 2:
+                            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                                preview = f.read(500)
+                            print(f"\n📄 {path.name} ({format_size(path.stat().st_size)}), beginning:\n{preview}...\n")
+                            follow_up = input("Ask about this file (or press Enter to skip): ").strip()
+                            if follow_up:
+                                await map_reduce_file(assistant, path, follow_up)
+                            continue
                         content = read_file(args)
                         print(f"\n📄 File contents:\n{content[:500]}{'...' if len(content) > 500 else ''}\n")
                         follow_up = input("Ask about this file (or press Enter to skip): ").strip()
@@ -575,6 +2227,32 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                             full_message = f"Here's the content of {args}:\n\n{content}\n\nQuestion: {follow_up}"
                             await assistant.chat(full_message)
                             
+                elif command == '/index':
+                    if not args or not Path(args).expanduser().is_dir():
+                        print("❌ Usage: /index <directory>\n")
+                        continue
+                    try:
+                        index = EmbeddingIndex(Path(args).expanduser(), config.index_dir, config.embed_model)
+                        print(f"🗂️  Indexing {index.root} with {config.embed_model}...")
+                        counts = await index.update(assistant.embed, config.embed_batch_size)
+                    except (RuntimeError, httpx.HTTPError) as e:
+                        print(f"❌ Indexing failed: {str(e)}\n")
+                        continue
+                    active_index = index
+                    print(f"✅ Indexed {len(index.chunks)} chunks: {counts['changed']} files embedded, "
+                          f"{counts['unchanged']} unchanged, {counts['removed']} removed\n")
+                
+                elif command == '/ask':
+                    if not args:
+                        print("❌ Usage: /ask <question>\n")
+                    elif active_index is None:
+                        print("❌ No index loaded. Run /index <directory> first\n")
+                    else:
+                        try:
+                            await ask_index(assistant, active_index, args)
+                        except (RuntimeError, httpx.HTTPError) as e:
+                            print(f"❌ Search failed: {str(e)}\n")
+                
                 elif command == '/exec':
                     if not args:
                         print("❌ Usage: /exec <command>\n")
@@ -582,8 +2260,9 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                         print(f"⚠️  About to execute: {args}")
                         confirm = input("Continue? (y/n): ").strip().lower()
                         if confirm == 'y':
-                            output, returncode = execute_shell_command(args)
-                            print(f"\n📤 Output (exit code {returncode}):\n{output}\n")
+                            print()
+                            output, returncode = await execute_shell_command(args, config.exec_timeout, config.exec_capture_chars)
+                            print(f"\n📤 Exit code {returncode} ({len(output)} characters kept for follow-up)\n")
                             follow_up = input("Ask AI about this output? (y/n): ").strip().lower()
                             if follow_up == 'y':
                                 full_message = f"I executed the command: {args}\n\nOutput:\n{output}\n\nWhat does this mean?"
@@ -592,8 +2271,34 @@ async def interactive_mode(assistant: OllamaAssistant, config: Config, mcp_manag
                             print("❌ Cancelled\n")
                             
                 elif command == '/save':
-                    config.save_conversation(assistant.conversation_history)
+                    assistant.save_conversation()
                     print("✅ Conversation saved!\n")
+                
+                elif command == '/search':
+                    if not args:
+                        print("❌ Usage: /search <terms>\n")
+                    else:
+                        print_search_results(config.conversations.search(args))
+                
+                elif command == '/history':
+                    if args.startswith('compact'):
+                        keep = args.split()[1] if len(args.split()) > 1 else None
+                        if keep is not None and not keep.isdigit():
+                            print("❌ Usage: /history compact [number to keep]\n")
+                            continue
+                        deleted = config.conversations.compact(int(keep) if keep else None)
+                        print(f"✅ History compacted ({deleted} conversations removed)\n")
+                        continue
+                    limit = int(args) if args.isdigit() else 20
+                    conversations = config.conversations.list_conversations(limit)
+                    if conversations:
+                        print("\n🗂️  Saved conversations:")
+                        for conv in conversations:
+                            print(f"  #{conv['id']} {conv['updated_at'][:16].replace('T', ' ')} "
+                                  f"[{conv['model'] or '?'}, {conv['message_count']} msgs] {conv['title']}")
+                        print()
+                    else:
+                        print("❌ No saved conversations\n")
                     
                 elif command == '/config':
                     print(f"""
@@ -601,6 +2306,8 @@ Current Configuration:
   Model: {config.model}
   Base URL: {config.base_url}
   Stream: {config.stream}
+  Keep Alive: {config.keep_alive}
+  Context Budget: {config.context_tokens} tokens (using ~{assistant.context.total_tokens})
   MCP Enabled: {config.mcp_enabled}
   System Prompt: {config.system_prompt[:50] + '...' if len(config.system_prompt) > 50 else config.system_prompt}
   Config Dir: {config.config_dir}
@@ -620,7 +2327,7 @@ Current Configuration:
                 # Regular chat message
                 await assistant.chat(user_input)
                 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             print("\n\n👋 Goodbye!")
             if mcp_manager:
                 await mcp_manager.disconnect_all()
@@ -634,15 +2341,125 @@ Current Configuration:
 async def single_query_mode(assistant: OllamaAssistant, query: str, mcp_manager: Optional[MCPManager] = None):
     """Run a single query and exit"""
     if mcp_manager:
-        await setup_mcp_servers(assistant.config, mcp_manager)
+        await setup_mcp_servers(assistant.config, mcp_manager, wait_all=True)
     
+    startup_ready()
     response = await assistant.chat(query, stream=False)
-    print(f"\n🤖 Assistant: {response}\n")
     
     if mcp_manager:
         await mcp_manager.disconnect_all()
+    if assistant.last_error:
+        print(assistant.last_error)
+        sys.exit(1)
+    print(f"\n🤖 Assistant: {response}\n")
+
+def parse_batch_line(line: str, line_number: int) -> Optional[Dict[str, Any]]:
+    """Turn one line of a batch file into a work item (plain text or JSONL)"""
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith('{'):
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            item = None
+        if isinstance(item, dict):
+            prompt = item.get('prompt') or item.get('query') or item.get('message')
+            if prompt:
+                return {
+                    'id': item.get('id', line_number),
+                    'prompt': prompt,
+                    'model': item.get('model'),
+                    'system': item.get('system'),
+                    'options': item.get('options')
+                }
+    return {'id': line_number, 'prompt': line, 'model': None, 'system': None, 'options': None}
+
+async def batch_mode(assistant: OllamaAssistant, batch_file: str, output_file: Optional[str] = None, concurrency: int = 4):
+    """Run every prompt in a batch file with a bounded pool of concurrent requests.
+    
+    Results are written as JSONL in completion order. With an output file,
+    items that already have a successful result there are skipped, so an
+    interrupted batch can be resumed by running the same command again.
+    """
+    done_ids = set()
+    if output_file and Path(output_file).exists():
+        with open(output_file, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'error' not in record:
+                    done_ids.add(record.get('id'))
+    
+    if concurrency > assistant.max_connections:
+        assistant.max_connections = concurrency
+        await assistant.close()
+    
+    system_prompt = assistant.config.system_prompt
+    out = open(output_file, 'a') if output_file else sys.stdout
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {'ok': 0, 'failed': 0, 'skipped': 0}
+    
+    async def run(item: Dict[str, Any]) -> Dict[str, Any]:
+        messages = []
+        system = item['system'] if item['system'] is not None else system_prompt
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": item['prompt']})
+        model = item['model'] or assistant.model
+        try:
+            result = await assistant.complete(messages, model=model, options=item['options'])
+            return {
+                'id': item['id'],
+                'model': model,
+                'response': result.get('message', {}).get('content', ''),
+                'eval_count': result.get('eval_count'),
+                'total_duration': result.get('total_duration')
+            }
+        except Exception as e:
+            # Any failure becomes an error record; a dead worker would stall the whole batch
+            return {'id': item['id'], 'model': model, 'error': str(e) or type(e).__name__}
+    
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            record = await run(item)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            counts['failed' if 'error' in record else 'ok'] += 1
+            print(f"\r⏳ {counts['ok']} done, {counts['failed']} failed", end="", file=sys.stderr, flush=True)
+    
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        with open(batch_file, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                item = parse_batch_line(line, line_number)
+                if item is None:
+                    continue
+                if item['id'] in done_ids:
+                    counts['skipped'] += 1
+                    continue
+                await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        if output_file:
+            out.close()
+    
+    print(f"\r✅ Batch complete: {counts['ok']} succeeded, {counts['failed']} failed, "
+          f"{counts['skipped']} already done", file=sys.stderr)
+    return counts
 
 async def async_main():
+    global _PRINT_STARTUP_PROFILE
+    mark_startup("imports")
     parser = argparse.ArgumentParser(
         description="Ollama Desktop CLI Assistant with MCP Support"
     )
@@ -652,48 +2469,75 @@ async def async_main():
     parser.add_argument('--list-models', action='store_true', help='List models')
     parser.add_argument('--reset-config', action='store_true', help='Reset config')
     parser.add_argument('--no-mcp', action='store_true', help='Disable MCP')
+    parser.add_argument('--search', metavar='TERMS', help='Search saved conversations')
+    parser.add_argument('--batch', metavar='FILE', help='Run prompts from a text or JSONL file')
+    parser.add_argument('-o', '--output', metavar='FILE', help='Batch results file (JSONL, resumable)')
+    parser.add_argument('-j', '--concurrency', type=int, default=4, help='Concurrent batch requests')
+    parser.add_argument('--cache', action='store_true', help='Reuse cached answers for identical requests')
+    parser.add_argument('--startup-profile', action='store_true', help='Report import and init time')
+    parser.add_argument('--metrics', metavar='FILE', help='Append per-turn timings to a JSONL file')
     
     args = parser.parse_args()
+    _PRINT_STARTUP_PROFILE = args.startup_profile
     
     config = Config()
+    mark_startup("config")
     
     if args.reset_config:
         config.config_file.unlink(missing_ok=True)
         print("✅ Configuration reset")
         return
     
+    if args.search:
+        print_search_results(config.conversations.search(args.search))
+        return
+    
     if args.model:
         config.model = args.model
     if args.url:
         config.base_url = args.url
+    if args.metrics:
+        config.metrics_file = args.metrics
     if args.no_mcp:
         config.mcp_enabled = False
     
     # Initialize MCP manager
     mcp_manager = None
-    if config.mcp_enabled and MCP_AVAILABLE:
+    if config.mcp_enabled and MCP_AVAILABLE and not args.batch:
         mcp_manager = MCPManager(config)
     
     assistant = OllamaAssistant(config, mcp_manager)
+    if args.cache:
+        assistant.cache_responses = True
+    mark_startup("assistant")
     
-    if not assistant.check_ollama_running():
-        print("❌ Cannot connect to Ollama at", assistant.base_url)
-        print("Run: ollama serve")
-        sys.exit(1)
-    
-    if args.list_models:
-        models = assistant.list_models()
-        if models:
-            print("\n📚 Available models:")
-            for model in models:
-                print(f"  • {model}")
-        sys.exit(0)
-    
-    if args.query:
-        await single_query_mode(assistant, args.query, mcp_manager)
-    else:
-        await interactive_mode(assistant, config, mcp_manager)
-        config.save()
+    try:
+        if args.list_models:
+            # Always ask Ollama: a cached list may name models that are gone
+            if await assistant.catalog.refresh() is None:
+                print("❌ Cannot connect to Ollama at", assistant.base_url)
+                print("Run: ollama serve")
+                sys.exit(1)
+            models = assistant.catalog.names
+            if models:
+                print("\n📚 Available models:")
+                for model in models:
+                    print(f"  • {model}")
+            sys.exit(0)
+        
+        if args.batch:
+            if not await assistant.check_ollama_running():
+                print("❌ Cannot connect to Ollama at", assistant.base_url)
+                print("Run: ollama serve")
+                sys.exit(1)
+            await batch_mode(assistant, args.batch, args.output, max(1, args.concurrency))
+        elif args.query:
+            await single_query_mode(assistant, args.query, mcp_manager)
+        else:
+            await interactive_mode(assistant, config, mcp_manager)
+            config.save()
+    finally:
+        await assistant.close()
 
 def main():
     asyncio.run(async_main())